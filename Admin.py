@@ -1,110 +1,124 @@
-import streamlit as st
-import os
-import sqlite3
-from backend.rag_pipeline import RAGPipeline
-from backend.pdf_utils import extract_text_from_pdf, chunk_text
-
-if "role" not in st.session_state or st.session_state.role != "admin":
-    st.warning("Admin access required")
-    st.stop()
-UPLOAD_FOLDER = "documents"
-DB_NAME = "telequiz.db"
-
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-st.set_page_config(page_title="Admin Panel", layout="wide")
-st.title("🛠 Admin Panel")
-
-# ==============================
-# SIMPLE ADMIN AUTH
-# ==============================
-st.sidebar.title("Admin Login")
-
-admin_user = st.sidebar.text_input("Admin Username")
-admin_pass = st.sidebar.text_input("Admin Password", type="password")
-
-if admin_user != "admin" or admin_pass != "admin123":
-    st.warning("Admin login required.")
-    st.stop()
-
-st.success("Admin Authenticated")
-
-# ==============================
-# INIT RAG
-# ==============================
-if "admin_rag" not in st.session_state:
-    st.session_state.admin_rag = RAGPipeline()
-
-# ==============================
-# DOCUMENT UPLOAD
-# ==============================
-st.subheader("📄 Upload Telecom Document")
-
-uploaded_file = st.file_uploader("Upload PDF", type="pdf")
-
-if uploaded_file:
-    file_path = os.path.join(UPLOAD_FOLDER, uploaded_file.name)
-
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    st.success(f"Document saved: {uploaded_file.name}")
-
-    # Store metadata in DB
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS documents (
-        document_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        document_name TEXT,
-        upload_date TEXT
-    )
-    """)
-
-    cursor.execute("""
-    INSERT INTO documents (document_name, upload_date)
-    VALUES (?, datetime('now'))
-    """, (uploaded_file.name,))
-
-    conn.commit()
-    conn.close()
-
-# ==============================
-# REBUILD FAISS INDEX
-# ==============================
-st.subheader("🔁 Rebuild Knowledge Base")
-
-if st.button("Rebuild FAISS Index from All Documents"):
-
-    all_chunks = []
-
-    for file in os.listdir(UPLOAD_FOLDER):
-        if file.endswith(".pdf"):
-            path = os.path.join(UPLOAD_FOLDER, file)
-            with open(path, "rb") as f:
-                text = extract_text_from_pdf(f)
-                chunks = chunk_text(text)
-                all_chunks.extend(chunks)
-
-    if all_chunks:
-        st.session_state.admin_rag.create_embeddings(all_chunks)
-        st.success("FAISS index rebuilt successfully.")
-    else:
-        st.warning("No documents found.")
-
-# ==============================
-# VIEW UPLOADED DOCUMENTS
-# ==============================
-st.subheader("📂 Uploaded Documents")
-
-conn = sqlite3.connect(DB_NAME)
-docs = conn.execute("SELECT * FROM documents").fetchall()
-conn.close()
-
-if docs:
-    for doc in docs:
-        st.write(f"• {doc[1]} (Uploaded: {doc[2]})")
-else:
+import streamlit as st
+import os
+from backend.rag_pipeline import get_shared_pipeline
+from backend.database import init_db, get_documents
+from backend.ingestion import ingest_pdf
+from backend.bulk_ingest import rebuild_library
+from backend.dedup import Deduplicator
+
+if "role" not in st.session_state or st.session_state.role != "admin":
+    st.warning("Admin access required")
+    st.stop()
+UPLOAD_FOLDER = "documents"
+
+init_db()
+
+if not os.path.exists(UPLOAD_FOLDER):
+    os.makedirs(UPLOAD_FOLDER)
+
+st.set_page_config(page_title="Admin Panel", layout="wide")
+st.title("🛠 Admin Panel")
+
+# ==============================
+# SIMPLE ADMIN AUTH
+# ==============================
+st.sidebar.title("Admin Login")
+
+admin_user = st.sidebar.text_input("Admin Username")
+admin_pass = st.sidebar.text_input("Admin Password", type="password")
+
+if admin_user != "admin" or admin_pass != "admin123":
+    st.warning("Admin login required.")
+    st.stop()
+
+st.success("Admin Authenticated")
+
+# ==============================
+# INIT RAG (shared by all sessions)
+# ==============================
+if "admin_rag" not in st.session_state:
+    st.session_state.admin_rag = get_shared_pipeline()
+
+if "indexed_fingerprints" not in st.session_state:
+    st.session_state.indexed_fingerprints = {}
+
+# ==============================
+# DOCUMENT UPLOAD
+# ==============================
+st.subheader("📄 Upload Telecom Document")
+
+uploaded_file = st.file_uploader("Upload PDF", type="pdf")
+
+if uploaded_file:
+    file_path = os.path.join(UPLOAD_FOLDER, uploaded_file.name)
+
+    with open(file_path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+
+    st.success(f"Document saved: {uploaded_file.name}")
+
+    # Only this document is embedded; re-uploading a name replaces it
+    deduplicator = Deduplicator()
+    try:
+        with st.spinner("Indexing document..."):
+            document_id, newly_indexed = ingest_pdf(
+                st.session_state.admin_rag,
+                uploaded_file,
+                st.session_state.indexed_fingerprints,
+                replace_by_name=True,
+                deduplicator=deduplicator
+            )
+    except TimeoutError:
+        # Another process holds the index write lock (e.g. a rebuild)
+        st.error("The index is busy with another update. Please try again shortly.")
+        st.stop()
+
+    if document_id is None:
+        st.error("Could not extract text from PDF.")
+    elif newly_indexed:
+        st.success(f"Indexed {uploaded_file.name}")
+        st.info(str(deduplicator.stats))
+
+# ==============================
+# REBUILD FAISS INDEX
+# ==============================
+st.subheader("🔁 Rebuild Knowledge Base")
+
+if st.button("Rebuild FAISS Index from All Documents"):
+
+    # PDFs are extracted in parallel worker processes and chunks are
+    # embedded as they stream in
+    try:
+        with st.spinner("Rebuilding index..."):
+            document_count, dedup_stats = rebuild_library(
+                st.session_state.admin_rag,
+                UPLOAD_FOLDER
+            )
+    except TimeoutError:
+        st.error("The index is busy with another update. Please try again shortly.")
+        st.stop()
+
+    if document_count:
+        st.success(
+            f"FAISS index rebuilt successfully "
+            f"({document_count} documents, {dedup_stats.kept} chunks)."
+        )
+        st.info(str(dedup_stats))
+    else:
+        st.warning("No documents found.")
+
+# Context builder savings in this process (merged overlaps, budget)
+st.caption(f"Prompt context: {st.session_state.admin_rag.context_stats}")
+
+# ==============================
+# VIEW UPLOADED DOCUMENTS
+# ==============================
+st.subheader("📂 Uploaded Documents")
+
+docs = get_documents()
+
+if docs:
+    for doc in docs:
+        st.write(f"• {doc[1]} (Uploaded: {doc[2]})")
+else:
     st.info("No documents uploaded yet.")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+import json
+
+# Answers graded per LLM call; a batch whose reply cannot be used is
+# split in half and retried, down to single answers
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "10"))
+# Batches graded at once (the LLM client also caps concurrency)
+EVAL_BATCH_WORKERS = int(os.getenv("EVAL_BATCH_WORKERS", "4"))
+
+CORRECTNESS_VALUES = ["Correct", "Partial", "Incorrect"]
+
+# Gemini structured output: the reply is always a JSON array of these
+EVALUATION_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "score": {"type": "INTEGER"},
+            "correctness": {"type": "STRING", "enum": CORRECTNESS_VALUES},
+            "weak_concept": {"type": "STRING"},
+            "explanation": {"type": "STRING"}
+        },
+        "required": ["id", "score", "correctness", "weak_concept", "explanation"]
+    }
+}
+
+EVALUATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": EVALUATION_SCHEMA
+}
+
+
+def build_batch_prompt(items):
+    # items: (item_id, context, question, answer). A cohort answering the
+    # same question shares one context, so each distinct context is sent
+    # once and referenced by number.
+    context_ids = {}
+    for _, context, _, _ in items:
+        context_ids.setdefault(context, len(context_ids) + 1)
+
+    contexts = "\n\n".join(f"[Context {cid}]\n{context}" for context, cid in context_ids.items())
+    answers = "\n\n".join(
+        f"[Answer id={item_id}] (uses Context {context_ids[context]})\n"
+        f"Question: {question}\n"
+        f"User Answer: {answer}"
+        for item_id, context, question, answer in items
+    )
+
+    return f"""
+You are an evaluation engine.
+Grade every answer below independently against its context.
+
+{contexts}
+
+{answers}
+
+Return one JSON object per answer, with the same id:
+score (integer between 0 and 10), correctness (Correct, Partial or
+Incorrect), weak_concept (short concept name) and explanation (brief).
+"""
+
+
+def parse_batch_response(raw_response, item_ids):
+    # Returns {item_id: result} for every well-formed entry with an id
+    # from this batch; anything else is left out for the caller to retry
+    data = json.loads(raw_response)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array")
+
+    results = {}
+    for entry in data:
+        try:
+            item_id = int(entry["id"])
+            result = {
+                "score": min(10, max(0, int(entry["score"]))),
+                "correctness": str(entry["correctness"]),
+                "weak_concept": str(entry["weak_concept"]),
+                "explanation": str(entry["explanation"])
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        if item_id in item_ids and result["correctness"] in CORRECTNESS_VALUES:
+            results[item_id] = result
+
+    return results
\ No newline at end of file
@@ -0,0 +1,87 @@
+import argparse
+import random
+import time
+import numpy as np
+from backend.embedding_engine import EmbeddingEngine, BACKENDS
+
+# Usage: python -m backend.benchmark_embeddings --backends torch,onnx,onnx_int8 --threads 4
+#        python -m backend.benchmark_embeddings --pdf "documents/tariffs.pdf" --batch-sizes 16,64
+#
+# Encodes the same chunks with each backend and batch size on CPU and
+# reports throughput, plus how far each backend's vectors drift from
+# the first one (cosine similarity), since switching means a rebuild.
+
+WORDS = (
+    "tariff plan roaming data voice sms bundle validity recharge network "
+    "subscriber billing prepaid postpaid spectrum handover latency bandwidth "
+    "operator coverage charges apply terms conditions customer activation"
+).split()
+
+
+def synthetic_chunks(count, seed=0):
+    # Mixed lengths, like real chunks, so length sorting has work to do
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 200)))
+        for _ in range(count)
+    ]
+
+
+def pdf_chunks(path):
+    from backend.pdf_utils import extract_text_from_pdf, chunk_text
+
+    with open(path, "rb") as f:
+        return chunk_text(extract_text_from_pdf(f))
+
+
+def cosine(a, b):
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend throughput benchmark")
+    parser.add_argument("--backends", default="torch,onnx,onnx_int8")
+    parser.add_argument("--batch-sizes", default="16,32,64,128")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--pdf")
+    args = parser.parse_args()
+
+    chunks = pdf_chunks(args.pdf) if args.pdf else synthetic_chunks(args.chunks)
+    print(f"{len(chunks)} chunks, threads={args.threads or 'default'}")
+    print(f"{'backend':<12}{'batch':>7}{'load s':>9}{'chunks/s':>11}{'min cos':>10}{'mean cos':>10}")
+
+    reference = None
+
+    for backend in args.backends.split(","):
+        if backend not in BACKENDS:
+            raise SystemExit(f"Unknown backend {backend}; choose from {', '.join(BACKENDS)}")
+
+        engine = EmbeddingEngine(backend=backend, threads=args.threads)
+        start = time.perf_counter()
+        try:
+            engine.encode(chunks[:8])
+        except Exception as e:
+            print(f"{backend:<12} unavailable: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+            start = time.perf_counter()
+            embeddings = engine.encode(chunks, batch_size=batch_size)
+            throughput = len(chunks) / (time.perf_counter() - start)
+
+            if reference is None:
+                reference = embeddings
+            similarity = cosine(reference, embeddings)
+
+            print(
+                f"{backend:<12}{batch_size:>7}{load_seconds:>9.2f}{throughput:>11.1f}"
+                f"{similarity.min():>10.4f}{similarity.mean():>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
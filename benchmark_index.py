@@ -0,0 +1,118 @@
+import argparse
+import time
+import faiss
+import numpy as np
+from backend.vector_store import build_index, choose_index_type, is_quantized, RERANK_FACTOR
+
+# Usage: python -m backend.benchmark_index --vectors 200000 --types flat,ivf_flat,hnsw,ivf_pq,sq8,pq
+#        python -m backend.benchmark_index --from-snapshot
+#
+# Reports recall@k against the exact flat index plus build time,
+# p50/p99 single-query latency and index memory for each index type.
+# Quantized types get a second "+rerank" row that re-ranks
+# RERANK_FACTOR * k candidates against float16 copies of the vectors.
+
+
+def synthetic_vectors(num_vectors, dimension, seed=0):
+    # Clustered data behaves more like sentence embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, num_vectors // 500), dimension)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=num_vectors)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(num_vectors, dimension)).astype(np.float32)
+    return vectors.astype(np.float32)
+
+
+def snapshot_vectors():
+    from backend.rag_pipeline import RAGPipeline
+
+    rag = RAGPipeline()
+    if rag.index is None:
+        raise SystemExit("No published index snapshot to benchmark.")
+
+    ids = rag.chunk_store.meta["chunk_id"]
+    return rag.index.reconstruct_batch(ids)
+
+
+def timed_search(index, queries, k, fp16_vectors=None):
+    latencies = []
+    results = []
+    fetch = k * RERANK_FACTOR if fp16_vectors is not None else k
+
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), fetch)
+        found = found[0]
+
+        if fp16_vectors is not None:
+            candidates = found[found >= 0]
+            distances = ((fp16_vectors[candidates].astype(np.float32) - query) ** 2).sum(axis=1)
+            found = candidates[np.argsort(distances)[:k]]
+
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(found)
+
+    return results, np.array(latencies)
+
+
+def index_megabytes(index):
+    return faiss.serialize_index(index).nbytes / 1e6
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / sum(len(t) for t in truth)
+
+
+def report(name, build_seconds, megabytes, flat_megabytes, recall, latencies):
+    print(
+        f"{name:<14}{build_seconds:>9.2f}{megabytes:>10.1f}{flat_megabytes / megabytes:>8.1f}x"
+        f"{recall:>10.3f}{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index recall/latency benchmark")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--types", default="flat,ivf_flat,hnsw,ivf_pq,sq8,pq")
+    parser.add_argument("--from-snapshot", action="store_true")
+    args = parser.parse_args()
+
+    if args.from_snapshot:
+        vectors = snapshot_vectors()
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dimension)
+
+    ids = np.arange(len(vectors), dtype=np.int64)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), size=args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+
+    exact = build_index(vectors, ids, "flat")
+    truth, _ = timed_search(exact, queries, args.k)
+    flat_megabytes = index_megabytes(exact)
+    fp16_vectors = vectors.astype(np.float16)
+
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {args.queries} queries, k={args.k}")
+    print(f"auto mode would pick: {choose_index_type(len(vectors), 'auto')}")
+    print(f"float16 re-rank store (on disk, memory-mapped): {fp16_vectors.nbytes / 1e6:.1f} MB")
+    print(f"{'type':<14}{'build s':>9}{'index MB':>10}{'saved':>9}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}")
+
+    for index_type in args.types.split(","):
+        start = time.perf_counter()
+        index = build_index(vectors, ids, index_type)
+        build_seconds = time.perf_counter() - start
+        megabytes = index_megabytes(index)
+
+        found, latencies = timed_search(index, queries, args.k)
+        report(index_type, build_seconds, megabytes, flat_megabytes, recall_at_k(truth, found), latencies)
+
+        if is_quantized(index):
+            found, latencies = timed_search(index, queries, args.k, fp16_vectors)
+            report(index_type + "+rerank", build_seconds, megabytes, flat_megabytes,
+                   recall_at_k(truth, found), latencies)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from backend.pdf_utils import iter_pdf_pages, count_pdf_pages, iter_chunks
+from backend.database import get_document_id, register_document
+from backend.dedup import Deduplicator
+
+# 0 or 1 extracts in-process (useful where process pools are unavailable)
+BULK_INGEST_WORKERS = int(os.getenv("BULK_INGEST_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = 16
+
+# Page ranges submitted ahead of the consumer; bounds memory held in
+# finished-but-unconsumed results
+MAX_IN_FLIGHT_PER_WORKER = 2
+
+
+# ==============================
+# PARALLEL PAGE EXTRACTION
+# ==============================
+
+def _extract_page_range(path, start, stop):
+    with open(path, "rb") as f:
+        return path, list(iter_pdf_pages(f, start, stop))
+
+
+def _page_tasks(paths):
+    for path in paths:
+        with open(path, "rb") as f:
+            page_count = count_pdf_pages(f)
+
+        for start in range(0, page_count, PAGES_PER_TASK):
+            yield path, start, min(start + PAGES_PER_TASK, page_count)
+
+
+def _iter_page_ranges(paths, workers):
+    if workers <= 1:
+        for task in _page_tasks(paths):
+            yield _extract_page_range(*task)
+        return
+
+    # Results are consumed in submission order so each document's pages
+    # arrive in sequence, while later ranges are extracted in parallel
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        for task in _page_tasks(paths):
+            in_flight.append(pool.submit(_extract_page_range, *task))
+            if len(in_flight) >= workers * MAX_IN_FLIGHT_PER_WORKER:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def iter_documents(paths, workers=BULK_INGEST_WORKERS):
+    # Yields (path, lazy page text iterator), one document at a time
+    for path, ranges in groupby(_iter_page_ranges(paths, workers), key=itemgetter(0)):
+        yield path, (page for _, pages in ranges for page in pages)
+
+
+# ==============================
+# LIBRARY REBUILD
+# ==============================
+
+def rebuild_library(rag, folder, workers=BULK_INGEST_WORKERS):
+    # Returns (document count, DedupStats); stats.kept is the number of
+    # chunks indexed
+    deduplicator = Deduplicator()
+    paths = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith(".pdf")
+    )
+    if not paths:
+        return 0, deduplicator.stats
+
+    def documents():
+        for path, pages in iter_documents(paths, workers):
+            name = os.path.basename(path)
+            document_id = get_document_id(name)
+            if document_id is None:
+                document_id = register_document(name)
+
+            # Chunks flow into embedding as pages are extracted; headers,
+            # footers and T&Cs seen in earlier documents are skipped
+            yield document_id, deduplicator.iter_filter(iter_chunks(pages), document_id)
+
+    # Published once every document is in; the previous library keeps
+    # serving until then, and stays if the rebuild fails
+    rag.add_documents(documents(), rebuild=True)
+    deduplicator.save()
+    return len(paths), deduplicator.stats
\ No newline at end of file
@@ -0,0 +1,242 @@
+import os
+import mmap
+import numpy as np
+
+# One row per indexed chunk; offset/length point into the UTF-8 blob,
+# vector_row into the optional float16 vector file (-1 when absent)
+CHUNK_META_DTYPE = np.dtype([
+    ("chunk_id", np.int64),
+    ("document_id", np.int64),
+    ("position", np.int32),
+    ("offset", np.int64),
+    ("length", np.int64),
+    ("vector_row", np.int64),
+])
+
+# Keep an exact-ish float16 copy of every vector on disk so quantized
+# indexes can re-rank their candidates
+STORE_FP16_VECTORS = os.getenv("FAISS_STORE_FP16_VECTORS", "1") == "1"
+
+
+def atomic_write(path, write_fn):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        write_fn(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ChunkStore:
+
+    def __init__(self, blob_path, meta_path, dimension=None):
+        self.blob_path = blob_path
+        self.meta_path = meta_path
+        self.vectors_path = os.path.splitext(blob_path)[0] + ".f16"
+        self.dimension = dimension
+        self.meta = np.zeros(0, dtype=CHUNK_META_DTYPE)
+        self._blob = None
+        self._vectors = None
+
+        if os.path.exists(blob_path) and os.path.exists(meta_path):
+            self.load()
+
+    def derive(self, meta_path):
+        # Same blob, private copy of the offsets; used to build the next
+        # snapshot while readers keep using this one
+        store = ChunkStore(self.blob_path, meta_path, self.dimension)
+        store.meta = self.meta.copy()
+        return store
+
+    def __len__(self):
+        return len(self.meta)
+
+    # ==============================
+    # LOAD (blob and vectors are memory-mapped)
+    # ==============================
+    def load(self):
+        meta = np.load(self.meta_path)
+        if meta.dtype != CHUNK_META_DTYPE:
+            # Written before vector rows were tracked
+            upgraded = np.full(len(meta), -1, dtype=CHUNK_META_DTYPE)
+            for name in meta.dtype.names:
+                upgraded[name] = meta[name]
+            meta = upgraded
+        self.meta = meta
+
+        self.close()
+        if os.path.getsize(self.blob_path) > 0:
+            with open(self.blob_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.dimension and os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (2 * self.dimension)
+            if rows > 0:
+                self._vectors = np.memmap(
+                    self.vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dimension)
+                )
+
+    def close(self):
+        if self._blob is not None:
+            self._blob.close()
+            self._blob = None
+        self._vectors = None
+
+    # ==============================
+    # WRITE (atomic replace)
+    # ==============================
+    def write(self, chunks, document_id=0, chunk_ids=None):
+        if chunk_ids is None:
+            chunk_ids = range(len(chunks))
+
+        meta, encoded = self._build_rows(document_id, chunk_ids, chunks, 0)
+
+        def write_blob(f):
+            for data in encoded:
+                f.write(data)
+
+        self.close()
+        atomic_write(self.blob_path, write_blob)
+        atomic_write(self.vectors_path, lambda f: None)
+        self._write_meta(meta)
+
+    # ==============================
+    # INCREMENTAL UPDATES
+    # ==============================
+    def append(self, document_id, chunk_ids, chunks, vectors=None, positions=None):
+        # The blob is append-only: readers holding an older mapping only
+        # ever see offsets that were committed before the meta swap
+        offset = os.path.getsize(self.blob_path) if os.path.exists(self.blob_path) else 0
+        rows, encoded = self._build_rows(document_id, chunk_ids, chunks, offset, positions)
+
+        with open(self.blob_path, "ab") as f:
+            for data in encoded:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if vectors is not None and STORE_FP16_VECTORS:
+            self._append_vectors(rows, vectors)
+
+        meta = np.concatenate([self.meta, rows])
+        meta.sort(order="chunk_id", kind="stable")
+        self._write_meta(meta)
+
+    def remove_document(self, document_id):
+        removed = self.chunk_ids_for(document_id)
+
+        # Orphaned bytes stay in the blob until the next full write()
+        self._write_meta(self.meta[self.meta["document_id"] != document_id])
+        return removed
+
+    def _append_vectors(self, rows, vectors):
+        vectors = np.asarray(vectors, dtype=np.float16)
+        self.dimension = self.dimension or vectors.shape[1]
+
+        first_row = 0
+        if os.path.exists(self.vectors_path):
+            first_row = os.path.getsize(self.vectors_path) // (2 * self.dimension)
+
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        rows["vector_row"] = np.arange(first_row, first_row + len(rows))
+
+    def chunk_ids_for(self, document_id):
+        return self.meta["chunk_id"][self.meta["document_id"] == document_id]
+
+    def _build_rows(self, document_id, chunk_ids, chunks, offset, positions=None):
+        # document_id may be one id or one per chunk (bulk ingestion)
+        encoded = [chunk.encode("utf-8") for chunk in chunks]
+        lengths = np.array([len(data) for data in encoded], dtype=np.int64)
+
+        rows = np.zeros(len(chunks), dtype=CHUNK_META_DTYPE)
+        rows["chunk_id"] = chunk_ids
+        rows["document_id"] = document_id
+        rows["position"] = np.arange(len(chunks)) if positions is None else positions
+        rows["offset"] = offset + np.cumsum(lengths) - lengths
+        rows["length"] = lengths
+        rows["vector_row"] = -1
+
+        return rows, encoded
+
+    def _write_meta(self, meta):
+        if not os.path.exists(self.blob_path):
+            atomic_write(self.blob_path, lambda f: None)
+
+        atomic_write(self.meta_path, lambda f: np.save(f, meta))
+        self.load()
+
+    # ==============================
+    # LOOKUP
+    # ==============================
+    def row_for(self, chunk_id):
+        ids = self.meta["chunk_id"]
+        row = int(np.searchsorted(ids, chunk_id))
+        if row < len(ids) and ids[row] == chunk_id:
+            return row
+        return None
+
+    def get_text(self, chunk_id):
+        row = self.row_for(chunk_id)
+        if row is None:
+            return None
+
+        offset = int(self.meta["offset"][row])
+        length = int(self.meta["length"][row])
+        if self._blob is None or length == 0:
+            return ""
+        return self._blob[offset:offset + length].decode("utf-8")
+
+    def get_texts(self, chunk_ids):
+        texts = []
+        for chunk_id in chunk_ids:
+            text = self.get_text(chunk_id)
+            if text is not None:
+                texts.append(text)
+        return texts
+
+    def get_chunks(self, chunk_ids):
+        # (document_id, position, text) per found id, in the given order;
+        # used to stitch neighbouring chunks back together
+        chunks = []
+        for chunk_id in chunk_ids:
+            row = self.row_for(chunk_id)
+            if row is not None:
+                chunks.append((
+                    int(self.meta["document_id"][row]),
+                    int(self.meta["position"][row]),
+                    self.get_text(chunk_id)
+                ))
+        return chunks
+
+    # ==============================
+    # FLOAT16 VECTORS (re-ranking)
+    # ==============================
+    def get_vectors(self, chunk_ids):
+        if self._vectors is None:
+            return None
+
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        ids = self.meta["chunk_id"]
+        rows = np.minimum(np.searchsorted(ids, chunk_ids), max(len(ids) - 1, 0))
+
+        if len(ids) == 0 or not (ids[rows] == chunk_ids).all():
+            return None
+
+        vector_rows = self.meta["vector_row"][rows]
+        if (vector_rows < 0).any():
+            return None
+
+        return np.asarray(self._vectors[vector_rows], dtype=np.float32)
+
+    def rerank(self, query_vector, chunk_ids, top_k):
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        vectors = self.get_vectors(chunk_ids)
+        if vectors is None:
+            return chunk_ids[:top_k]
+
+        distances = ((vectors - query_vector) ** 2).sum(axis=1)
+        return chunk_ids[np.argsort(distances, kind="stable")[:top_k]]
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os
+import re
+import threading
+from backend.pdf_utils import estimate_tokens
+
+# Upper bound on context tokens sent with each question / evaluation
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+
+# Overlap shorter than this is treated as coincidence, not chunk overlap
+MIN_OVERLAP_CHARS = 20
+OVERLAP_PROBE_CHARS = 32
+
+SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+
+class ContextStats:
+    # Running totals for how much the builder trimmed from prompts
+
+    def __init__(self):
+        self.calls = 0
+        self.raw_tokens = 0
+        self.packed_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def saved_tokens(self):
+        return self.raw_tokens - self.packed_tokens
+
+    def add(self, raw_tokens, packed_tokens):
+        with self._lock:
+            self.calls += 1
+            self.raw_tokens += raw_tokens
+            self.packed_tokens += packed_tokens
+
+    def __str__(self):
+        percent = 100 * self.saved_tokens / self.raw_tokens if self.raw_tokens else 0
+        return (
+            f"{self.saved_tokens} of {self.raw_tokens} context tokens saved "
+            f"over {self.calls} calls ({percent:.1f}%)"
+        )
+
+
+def overlap_start(first, second):
+    # Index in first where second continues it (first[i:] is a prefix of
+    # second), or None. Chunks are exact slices of the document, so
+    # neighbouring chunks overlap character for character.
+    probe = second[:OVERLAP_PROBE_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return None
+
+    start = first.find(probe, max(0, len(first) - len(second)))
+    while start != -1:
+        if len(first) - start >= MIN_OVERLAP_CHARS and second.startswith(first[start:]):
+            return start
+        start = first.find(probe, start + 1)
+
+    return None
+
+
+def merge_chunks(chunks):
+    # chunks: (rank, document_id, position, text), rank 0 = best match.
+    # Consecutive chunks of one document are stitched into a single
+    # segment without the repeated overlap; a chunk already contained in
+    # another segment is dropped. Returns [(rank, text)] best first.
+    segments = []
+
+    for document_id in sorted({chunk[1] for chunk in chunks}):
+        document_chunks = sorted(
+            (chunk for chunk in chunks if chunk[1] == document_id), key=lambda chunk: chunk[2]
+        )
+
+        rank, _, position, text = document_chunks[0]
+        for next_rank, _, next_position, next_text in document_chunks[1:]:
+            start = overlap_start(text, next_text) if next_position == position + 1 else None
+
+            if start is not None:
+                text = text[:start] + next_text
+                rank = min(rank, next_rank)
+            else:
+                segments.append((rank, text))
+                rank, text = next_rank, next_text
+            position = next_position
+
+        segments.append((rank, text))
+
+    segments.sort(key=lambda segment: segment[0])
+
+    unique = []
+    for rank, text in segments:
+        stripped = text.strip()
+        if stripped and not any(stripped in kept for _, kept in unique):
+            unique.append((rank, stripped))
+
+    return unique
+
+
+def truncate_to_budget(text, budget):
+    # Longest prefix within budget, cut at a sentence end when possible
+    if estimate_tokens(text) <= budget:
+        return text
+
+    cut = 0
+    for match in SENTENCE_END.finditer(text):
+        if estimate_tokens(text, 0, match.end()) > budget:
+            break
+        cut = match.end()
+
+    if cut == 0:
+        words = text.split()
+        while words and estimate_tokens(" ".join(words)) > budget:
+            words = words[:max(0, len(words) - max(1, len(words) // 8))]
+        return " ".join(words)
+
+    return text[:cut].strip()
+
+
+def build_context(chunks, budget=CONTEXT_TOKEN_BUDGET):
+    # Returns (context text, raw tokens, packed tokens); raw is what
+    # joining the chunks as-is would have cost
+    raw_tokens = sum(estimate_tokens(chunk[3]) for chunk in chunks)
+
+    parts = []
+    remaining = budget
+    for _, text in merge_chunks(chunks):
+        if remaining <= 0:
+            break
+
+        text = truncate_to_budget(text, remaining)
+        if text:
+            parts.append(text)
+            remaining -= estimate_tokens(text)
+
+    context = "\n".join(parts)
+    return context, raw_tokens, estimate_tokens(context)
\ No newline at end of file
@@ -1,220 +1,679 @@
-import sqlite3
-import bcrypt
-
-DB_NAME = "telequiz.db"
-
-def get_connection():
-    return sqlite3.connect(DB_NAME)
-
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.executescript("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT UNIQUE,
-        password TEXT,
-        role TEXT DEFAULT 'user'
-    );
-
-    CREATE TABLE IF NOT EXISTS documents (
-        document_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        document_name TEXT,
-        version INTEGER,
-        upload_date TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS chunks (
-        chunk_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        document_id INTEGER,
-        chunk_text TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS sessions (
-        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        topic TEXT,
-        start_time TEXT,
-        end_time TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS questions (
-        question_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id INTEGER,
-        question_text TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS evaluations (
-        evaluation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        question_id INTEGER,
-        answer TEXT,
-        score INTEGER,
-        correctness TEXT,
-        weak_concept TEXT,
-        explanation TEXT,
-        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-    );
-
-    CREATE TABLE IF NOT EXISTS performance (
-        performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        concept TEXT,
-        total_attempts INTEGER,
-        average_score REAL,
-        mastery_level TEXT
-    );
-    """)
-
-    conn.commit()
-    conn.close()
-
-# ==============================
-# AUTH
-# ==============================
-
-def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-
-def verify_password(password, hashed):
-    return bcrypt.checkpw(password.encode(), hashed.encode())
-
-def register_user(name, email, password, role="user"):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (name,email,password,role) VALUES (?,?,?,?)",
-        (name, email, hash_password(password), role)
-    )
-    conn.commit()
-    conn.close()
-
-def login_user(email, password):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id,password,role FROM users WHERE email=?", (email,))
-    user = cursor.fetchone()
-    conn.close()
-
-    if user and verify_password(password, user[1]):
-        return {"user_id": user[0], "role": user[2]}
-    return None
-
-# ==============================
-# SESSION
-# ==============================
-
-def create_session(user_id, topic):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO sessions (user_id,topic,start_time) VALUES (?, ?, datetime('now'))",
-        (user_id, topic)
-    )
-    session_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return session_id
-
-def end_session(session_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE sessions SET end_time=datetime('now') WHERE session_id=?",
-        (session_id,)
-    )
-    conn.commit()
-    conn.close()
-    # ==============================
-# STORE QUESTION
-# ==============================
-
-def store_question(session_id, question_text):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "INSERT INTO questions (session_id, question_text) VALUES (?, ?)",
-        (session_id, question_text)
-    )
-
-    question_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return question_id
-
-
-# ==============================
-# STORE EVALUATION
-# ==============================
-
-def store_evaluation(question_id, answer, result):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO evaluations 
-        (question_id, answer, score, correctness, weak_concept, explanation)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (
-        question_id,
-        answer,
-        result["score"],
-        result["correctness"],
-        result["weak_concept"],
-        result["explanation"]
-    ))
-
-    conn.commit()
-    conn.close()
-
-
-# ==============================
-# UPDATE PERFORMANCE
-# ==============================
-
-def update_performance(user_id, concept, score):
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT total_attempts, average_score 
-        FROM performance 
-        WHERE user_id=? AND concept=?
-    """, (user_id, concept))
-
-    existing = cursor.fetchone()
-
-    if existing:
-        total_attempts = existing[0] + 1
-        new_avg = ((existing[1] * existing[0]) + score) / total_attempts
-    else:
-        total_attempts = 1
-        new_avg = score
-
-    if new_avg >= 8:
-        mastery = "High"
-    elif new_avg >= 6:
-        mastery = "Medium"
-    else:
-        mastery = "Low"
-
-    cursor.execute("""
-        INSERT OR REPLACE INTO performance
-        (performance_id, user_id, concept, total_attempts, average_score, mastery_level)
-        VALUES (
-            (SELECT performance_id FROM performance WHERE user_id=? AND concept=?),
-            ?, ?, ?, ?, ?
-        )
-    """, (
-        user_id, concept,
-        user_id, concept,
-        total_attempts,
-        new_avg,
-        mastery
-    ))
-
-    conn.commit()
-    conn.close()
\ No newline at end of file
+import bcrypt
+from backend.db_pool import get_pooled_connection
+
+DB_NAME = "telequiz.db"
+
+def get_connection():
+    # Per-thread WAL connection reused across calls; close() just ends
+    # the transaction
+    return get_pooled_connection(DB_NAME)
+
+def init_db():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.executescript("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT UNIQUE,
+        password TEXT,
+        role TEXT DEFAULT 'user'
+    );
+
+    CREATE TABLE IF NOT EXISTS documents (
+        document_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_name TEXT,
+        version INTEGER,
+        upload_date TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS chunks (
+        chunk_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER,
+        chunk_text TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS chunk_fingerprints (
+        fingerprint_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER,
+        digest BLOB,
+        signature BLOB
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_chunk_fingerprints_digest ON chunk_fingerprints(digest);
+    CREATE INDEX IF NOT EXISTS idx_chunk_fingerprints_document ON chunk_fingerprints(document_id);
+
+    CREATE TABLE IF NOT EXISTS chunk_fingerprint_bands (
+        band_key BLOB,
+        fingerprint_id INTEGER
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_chunk_fingerprint_bands_key ON chunk_fingerprint_bands(band_key);
+
+    CREATE TABLE IF NOT EXISTS chunk_duplicates (
+        duplicate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER,
+        fingerprint_id INTEGER,
+        chunk_text TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_chunk_duplicates_fingerprint ON chunk_duplicates(fingerprint_id);
+    CREATE INDEX IF NOT EXISTS idx_chunk_duplicates_document ON chunk_duplicates(document_id);
+
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        topic TEXT,
+        start_time TEXT,
+        end_time TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS questions (
+        question_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER,
+        question_text TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS question_bank (
+        bank_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT,
+        question_text TEXT,
+        context TEXT,
+        times_served INTEGER DEFAULT 0,
+        index_version INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_question_bank_topic ON question_bank(topic, created_at);
+
+    CREATE TABLE IF NOT EXISTS question_bank_sources (
+        bank_id INTEGER,
+        document_id INTEGER
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_question_bank_sources_bank ON question_bank_sources(bank_id);
+
+    CREATE TABLE IF NOT EXISTS question_bank_served (
+        user_id INTEGER,
+        bank_id INTEGER,
+        served_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, bank_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS evaluations (
+        evaluation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_id INTEGER,
+        answer TEXT,
+        score INTEGER,
+        correctness TEXT,
+        weak_concept TEXT,
+        explanation TEXT,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS performance (
+        performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        concept TEXT,
+        total_attempts INTEGER,
+        average_score REAL,
+        mastery_level TEXT
+    );
+    """)
+
+    # Columns added after the first release; older databases lack them
+    add_missing_column(cursor, "documents", "version", "INTEGER")
+    add_missing_column(cursor, "documents", "content_hash", "TEXT")
+    add_missing_column(cursor, "question_bank", "index_version", "INTEGER")
+
+    conn.commit()
+    conn.close()
+
+def add_missing_column(cursor, table, column, column_type):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+# ==============================
+# AUTH
+# ==============================
+
+def hash_password(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+def verify_password(password, hashed):
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+def register_user(name, email, password, role="user"):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO users (name,email,password,role) VALUES (?,?,?,?)",
+        (name, email, hash_password(password), role)
+    )
+    conn.commit()
+    conn.close()
+
+def login_user(email, password):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id,password,role FROM users WHERE email=?", (email,))
+    user = cursor.fetchone()
+    conn.close()
+
+    if user and verify_password(password, user[1]):
+        return {"user_id": user[0], "role": user[2]}
+    return None
+
+# ==============================
+# SESSION
+# ==============================
+
+def create_session(user_id, topic):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO sessions (user_id,topic,start_time) VALUES (?, ?, datetime('now'))",
+        (user_id, topic)
+    )
+    session_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return session_id
+
+def end_session(session_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE sessions SET end_time=datetime('now') WHERE session_id=?",
+        (session_id,)
+    )
+    conn.commit()
+    conn.close()
+
+
+# ==============================
+# DOCUMENTS & CHUNKS
+# ==============================
+
+def register_document(document_name, content_hash=None):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO documents (document_name, content_hash, upload_date) VALUES (?, ?, datetime('now'))",
+        (document_name, content_hash)
+    )
+    document_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return document_id
+
+def get_document_id(document_name):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT document_id FROM documents WHERE document_name=? ORDER BY document_id DESC",
+        (document_name,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def get_document_by_hash(content_hash):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT document_id FROM documents WHERE content_hash=? ORDER BY document_id DESC",
+        (content_hash,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def set_document_hash(document_id, content_hash):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE documents SET content_hash=?, upload_date=datetime('now') WHERE document_id=?",
+        (content_hash, document_id)
+    )
+    conn.commit()
+    conn.close()
+
+def get_max_document_version():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(version) FROM documents")
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] or 0
+
+def set_document_version(document_id, version):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE documents SET version=? WHERE document_id=?",
+        (version, document_id)
+    )
+    conn.commit()
+    conn.close()
+
+def has_indexed_chunks(document_id):
+    # A published version and chunk rows, or only chunks dropped as
+    # copies of other documents'; rows go when the document is deleted
+    # or its upload fails before publishing
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT 1 FROM documents d
+        WHERE d.document_id=? AND d.version IS NOT NULL AND (
+            EXISTS (SELECT 1 FROM chunks c WHERE c.document_id = d.document_id)
+            OR EXISTS (SELECT 1 FROM chunk_duplicates u WHERE u.document_id = d.document_id)
+        )
+        """,
+        (document_id,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row is not None
+
+def get_documents():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT document_id, document_name, upload_date FROM documents")
+    docs = cursor.fetchall()
+    conn.close()
+    return docs
+
+def store_chunks(document_id, chunks):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    chunk_ids = []
+    for chunk in chunks:
+        cursor.execute(
+            "INSERT INTO chunks (document_id, chunk_text) VALUES (?, ?)",
+            (document_id, chunk)
+        )
+        chunk_ids.append(cursor.lastrowid)
+
+    conn.commit()
+    conn.close()
+    return chunk_ids
+
+def delete_chunks(document_id=None):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if document_id is None:
+        cursor.execute("DELETE FROM chunks")
+    else:
+        cursor.execute("DELETE FROM chunks WHERE document_id=?", (document_id,))
+    delete_fingerprints(cursor, None if document_id is None else [document_id])
+
+    conn.commit()
+    conn.close()
+
+def get_chunk_ids(document_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT chunk_id FROM chunks WHERE document_id=?", (document_id,))
+    chunk_ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return chunk_ids
+
+def get_max_chunk_id():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(chunk_id) FROM chunks")
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] or 0
+
+def delete_chunks_before(chunk_id):
+    # Rows of the generation replaced by a full rebuild
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM chunks WHERE chunk_id < ?", (chunk_id,))
+    conn.commit()
+    conn.close()
+
+def delete_chunk_ids(chunk_ids):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("DELETE FROM chunks WHERE chunk_id=?", ((int(c),) for c in chunk_ids))
+    conn.commit()
+    conn.close()
+
+
+# ==============================
+# CHUNK FINGERPRINTS (deduplication)
+# ==============================
+# Exact digests and MinHash signatures of indexed chunks, so a single
+# upload is deduplicated against the whole library. A chunk dropped as
+# a copy of another document's chunk is kept in chunk_duplicates with
+# a link to that chunk, so it can be indexed again for its own document
+# once the copy it relied on is replaced or deleted.
+
+def delete_fingerprints(cursor, document_ids=None):
+    # Links pointing at the deleted fingerprints are left behind on
+    # purpose; get_orphaned_duplicates() finds them
+    if document_ids is None:
+        cursor.execute("DELETE FROM chunk_fingerprint_bands")
+        cursor.execute("DELETE FROM chunk_fingerprints")
+        cursor.execute("DELETE FROM chunk_duplicates")
+        return
+
+    for document_id in document_ids:
+        cursor.execute(
+            """
+            DELETE FROM chunk_fingerprint_bands WHERE fingerprint_id IN (
+                SELECT fingerprint_id FROM chunk_fingerprints WHERE document_id=?
+            )
+            """,
+            (document_id,)
+        )
+        cursor.execute("DELETE FROM chunk_fingerprints WHERE document_id=?", (document_id,))
+        cursor.execute("DELETE FROM chunk_duplicates WHERE document_id=?", (document_id,))
+
+def replace_chunk_fingerprints(fingerprints, duplicates=(), document_ids=None):
+    # fingerprints: (document_id, digest, signature or None, band keys).
+    # duplicates: (document_id, fingerprint_id, kept_index, chunk_text),
+    # linking to a library fingerprint_id or, when that is None, to
+    # fingerprints[kept_index]. Existing rows of document_ids are
+    # replaced; None replaces all, () only adds.
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    delete_fingerprints(cursor, document_ids)
+
+    fingerprint_ids = []
+    for document_id, digest, signature, band_keys in fingerprints:
+        cursor.execute(
+            "INSERT INTO chunk_fingerprints (document_id, digest, signature) VALUES (?, ?, ?)",
+            (document_id, digest, signature)
+        )
+        fingerprint_id = cursor.lastrowid
+        fingerprint_ids.append(fingerprint_id)
+        cursor.executemany(
+            "INSERT INTO chunk_fingerprint_bands (band_key, fingerprint_id) VALUES (?, ?)",
+            ((key, fingerprint_id) for key in band_keys)
+        )
+
+    cursor.executemany(
+        "INSERT INTO chunk_duplicates (document_id, fingerprint_id, chunk_text) VALUES (?, ?, ?)",
+        (
+            (document_id, fingerprint_ids[kept_index] if fingerprint_id is None else fingerprint_id, text)
+            for document_id, fingerprint_id, kept_index, text in duplicates
+        )
+    )
+
+    conn.commit()
+    conn.close()
+
+def find_chunk_digest(digest, exclude_document_id=None):
+    # fingerprint_id of a library chunk with this exact digest, or None
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT fingerprint_id FROM chunk_fingerprints WHERE digest=? AND document_id IS NOT ? LIMIT 1",
+        (digest, exclude_document_id)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def get_band_candidates(band_keys, exclude_document_id=None):
+    # (fingerprint_id, signature) of library chunks sharing an LSH band
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(band_keys))
+    cursor.execute(
+        f"""
+        SELECT DISTINCT f.fingerprint_id, f.signature
+        FROM chunk_fingerprint_bands b
+        JOIN chunk_fingerprints f ON f.fingerprint_id = b.fingerprint_id
+        WHERE b.band_key IN ({placeholders}) AND f.document_id IS NOT ?
+        """,
+        (*band_keys, exclude_document_id)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def get_orphaned_duplicates():
+    # (duplicate_id, document_id, chunk_text) of dropped chunks whose
+    # kept copy no longer exists
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT duplicate_id, document_id, chunk_text FROM chunk_duplicates
+        WHERE fingerprint_id NOT IN (SELECT fingerprint_id FROM chunk_fingerprints)
+        ORDER BY document_id, duplicate_id
+    """)
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def delete_duplicate_rows(duplicate_ids):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("DELETE FROM chunk_duplicates WHERE duplicate_id=?", ((i,) for i in duplicate_ids))
+    conn.commit()
+    conn.close()
+
+
+# ==============================
+# STORE QUESTION
+# ==============================
+
+def store_question(session_id, question_text):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "INSERT INTO questions (session_id, question_text) VALUES (?, ?)",
+        (session_id, question_text)
+    )
+
+    question_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return question_id
+
+
+# ==============================
+# STORE EVALUATION
+# ==============================
+
+def store_evaluation(question_id, answer, result):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO evaluations 
+        (question_id, answer, score, correctness, weak_concept, explanation)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        question_id,
+        answer,
+        result["score"],
+        result["correctness"],
+        result["weak_concept"],
+        result["explanation"]
+    ))
+
+    conn.commit()
+    conn.close()
+
+
+# ==============================
+# UPDATE PERFORMANCE
+# ==============================
+
+def update_performance(user_id, concept, score):
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT total_attempts, average_score 
+        FROM performance 
+        WHERE user_id=? AND concept=?
+    """, (user_id, concept))
+
+    existing = cursor.fetchone()
+
+    if existing:
+        total_attempts = existing[0] + 1
+        new_avg = ((existing[1] * existing[0]) + score) / total_attempts
+    else:
+        total_attempts = 1
+        new_avg = score
+
+    if new_avg >= 8:
+        mastery = "High"
+    elif new_avg >= 6:
+        mastery = "Medium"
+    else:
+        mastery = "Low"
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO performance
+        (performance_id, user_id, concept, total_attempts, average_score, mastery_level)
+        VALUES (
+            (SELECT performance_id FROM performance WHERE user_id=? AND concept=?),
+            ?, ?, ?, ?, ?
+        )
+    """, (
+        user_id, concept,
+        user_id, concept,
+        total_attempts,
+        new_avg,
+        mastery
+    ))
+
+    conn.commit()
+    conn.close()
+
+
+# ==============================
+# QUESTION BANK
+# ==============================
+# Pre-generated questions per topic. A question is fresh for
+# max_age_hours, is served at most max_serves times and never twice to
+# the same user. It goes stale as soon as a document its context came
+# from is replaced, deleted or rebuilt after the snapshot it was
+# generated from (documents.version > index_version).
+
+BANK_UP_TO_DATE = """
+    index_version IS NOT NULL
+    AND NOT EXISTS (
+        SELECT 1 FROM question_bank_sources s
+        JOIN documents d ON d.document_id = s.document_id
+        WHERE s.bank_id = question_bank.bank_id AND d.version > question_bank.index_version
+    )
+"""
+
+def store_bank_questions(topic, questions, context, document_ids=(), index_version=None):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    for question in questions:
+        cursor.execute(
+            "INSERT INTO question_bank (topic, question_text, context, index_version, created_at) "
+            "VALUES (?, ?, ?, ?, datetime('now'))",
+            (topic, question, context, index_version)
+        )
+        bank_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO question_bank_sources (bank_id, document_id) VALUES (?, ?)",
+            [(bank_id, document_id) for document_id in document_ids]
+        )
+
+    conn.commit()
+    conn.close()
+
+def count_bank_questions(topic, max_age_hours, max_serves):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM question_bank
+        WHERE topic=? AND times_served < ? AND created_at >= datetime('now', ?)
+          AND {BANK_UP_TO_DATE}
+    """, (topic, max_serves, f"-{max_age_hours} hours"))
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+def get_bank_question_texts(topic, limit=20):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT question_text FROM question_bank WHERE topic=? ORDER BY bank_id DESC LIMIT ?",
+        (topic, limit)
+    )
+    texts = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return texts
+
+def take_bank_question(user_id, topic, max_age_hours, max_serves):
+    # Returns (question_text, context) or None when the pool has nothing
+    # fresh this user has not seen
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT bank_id, question_text, context FROM question_bank
+        WHERE topic=? AND times_served < ? AND created_at >= datetime('now', ?)
+          AND bank_id NOT IN (SELECT bank_id FROM question_bank_served WHERE user_id=?)
+          AND {BANK_UP_TO_DATE}
+        ORDER BY times_served, bank_id
+        LIMIT 1
+    """, (topic, max_serves, f"-{max_age_hours} hours", user_id))
+    row = cursor.fetchone()
+
+    if row is not None:
+        cursor.execute(
+            "UPDATE question_bank SET times_served = times_served + 1 WHERE bank_id=?",
+            (row[0],)
+        )
+        cursor.execute(
+            "INSERT OR IGNORE INTO question_bank_served (user_id, bank_id, served_at) VALUES (?, ?, datetime('now'))",
+            (user_id, row[0])
+        )
+        conn.commit()
+
+    conn.close()
+    return (row[1], row[2]) if row else None
+
+def prune_bank_questions(max_age_hours):
+    # Drops expired and stale questions with their served/source rows
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT bank_id FROM question_bank WHERE created_at < datetime('now', ?) OR NOT ({BANK_UP_TO_DATE})",
+        (f"-{max_age_hours} hours",)
+    )
+    bank_ids = [(row[0],) for row in cursor.fetchall()]
+
+    cursor.executemany("DELETE FROM question_bank_served WHERE bank_id=?", bank_ids)
+    cursor.executemany("DELETE FROM question_bank_sources WHERE bank_id=?", bank_ids)
+    cursor.executemany("DELETE FROM question_bank WHERE bank_id=?", bank_ids)
+    conn.commit()
+    conn.close()
+
+def get_recent_topics(limit=20):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT topic FROM sessions
+        WHERE topic IS NOT NULL AND topic != ''
+        GROUP BY topic
+        ORDER BY MAX(start_time) DESC
+        LIMIT ?
+    """, (limit,))
+    topics = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return topics
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+
+# Writers wait this long for a lock instead of failing with "database
+# is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Prepared statements kept per connection (sqlite3's statement cache)
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+# Page cache per connection, in KiB
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(64 * 1024 * 1024)))
+
+
+class PooledConnection(sqlite3.Connection):
+    # One per thread and database file, reused across calls. close() only
+    # ends the current transaction so existing open/commit/close code
+    # keeps working; release() really closes it.
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        super().close()
+
+
+_local = threading.local()
+_all_connections = []
+_all_connections_lock = threading.Lock()
+
+
+def _configure(conn):
+    # WAL lets readers run alongside the single writer; NORMAL sync is
+    # safe with WAL and avoids an fsync per commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def _release_dead_threads():
+    # Streamlit runs each rerun on a fresh thread; connections of
+    # finished threads are closed when the next one is opened
+    with _all_connections_lock:
+        alive = []
+        for thread, conn in _all_connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.release()
+        _all_connections[:] = alive
+
+
+def get_pooled_connection(path):
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        _release_dead_threads()
+
+        # Only the owning thread uses the connection; the check is off so
+        # _release_dead_threads() can close it once that thread is gone
+        conn = sqlite3.connect(
+            path,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        _configure(conn)
+        connections[path] = conn
+
+        with _all_connections_lock:
+            _all_connections.append((threading.current_thread(), conn))
+
+    elif conn.in_transaction:
+        # Left open by a caller that raised before committing
+        conn.rollback()
+
+    return conn
\ No newline at end of file
@@ -0,0 +1,200 @@
+import re
+import hashlib
+from collections import defaultdict
+import numpy as np
+from backend.index_snapshots import INTERACTIVE_WRITE_LOCK_TIMEOUT
+from backend.database import (
+    replace_chunk_fingerprints,
+    find_chunk_digest,
+    get_band_candidates,
+    get_orphaned_duplicates,
+    delete_duplicate_rows
+)
+
+WORD = re.compile(r"\w+")
+
+SHINGLE_SIZE = 3
+# MinHash signature of NUM_PERM values, bucketed into BANDS bands for LSH;
+# candidates sharing a band are confirmed on estimated Jaccard similarity
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+NEAR_DUPLICATE_JACCARD = 0.8
+# Below this many words MinHash is too noisy; only exact matches apply
+MIN_WORDS_FOR_NEAR = 8
+
+_rng = np.random.default_rng(20240607)
+_PERM_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_words(text):
+    return WORD.findall(text.lower())
+
+
+def minhash(words):
+    shingles = {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    }
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles],
+        dtype=np.uint64
+    )
+
+    # Multiply-shift hashing (wrapping uint64) stands in for permutations
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return permuted.min(axis=0)
+
+
+def band_keys(signature):
+    return [
+        bytes([band]) + signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        for band in range(BANDS)
+    ]
+
+
+class DedupStats:
+
+    def __init__(self):
+        self.total = 0
+        self.exact = 0
+        self.near = 0
+
+    @property
+    def removed(self):
+        return self.exact + self.near
+
+    @property
+    def kept(self):
+        return self.total - self.removed
+
+    def __str__(self):
+        percent = 100 * self.removed / self.total if self.total else 0
+        return (
+            f"{self.removed} of {self.total} chunks removed before embedding "
+            f"({self.exact} exact, {self.near} near-duplicate, {percent:.1f}%)"
+        )
+
+
+class Deduplicator:
+    # Tracks every chunk kept so far within one ingestion run (a document
+    # or a full library rebuild), so repeated headers, footers and T&Cs
+    # are embedded once. With check_library(), chunks are also compared
+    # with the fingerprints saved for documents already indexed. A chunk
+    # dropped as a copy of another document's chunk is saved with a link
+    # to it (see restore_orphaned_duplicates).
+
+    def __init__(self, threshold=NEAR_DUPLICATE_JACCARD):
+        self.threshold = threshold
+        self.stats = DedupStats()
+        self._reset()
+        self._check_library = False
+        self._exclude_document_id = None
+
+    def _reset(self):
+        # _exact maps a digest, and _bands holds (signature, ...), to the
+        # kept chunk's (document_id, None, index into _kept)
+        self._exact = {}
+        self._bands = defaultdict(list)
+        self._kept = []
+        self._duplicates = []
+
+    def check_library(self, exclude_document_id=None):
+        # exclude_document_id: the document being replaced, whose old
+        # chunks must not suppress its new version
+        self._check_library = True
+        self._exclude_document_id = exclude_document_id
+
+    def is_duplicate(self, text, document_id=None):
+        words = normalize_words(text)
+
+        digest = hashlib.sha1(" ".join(words).encode("utf-8")).digest()
+        match = self._exact.get(digest)
+        if match is None and self._check_library:
+            fingerprint_id = find_chunk_digest(digest, self._exclude_document_id)
+            if fingerprint_id is not None:
+                match = (None, fingerprint_id, None)
+        if match is not None:
+            self.stats.exact += 1
+            self._link(text, document_id, match)
+            return True
+
+        signature = None
+        keys = []
+        if len(words) >= MIN_WORDS_FOR_NEAR:
+            signature = minhash(words)
+            keys = band_keys(signature)
+
+            candidates = [other for key in keys for other in self._bands[key]]
+            if self._check_library:
+                candidates += [
+                    (np.frombuffer(other, dtype=np.uint64), None, fingerprint_id, None)
+                    for fingerprint_id, other in get_band_candidates(keys, self._exclude_document_id)
+                ]
+
+            for other, *match in candidates:
+                if np.mean(signature == other) >= self.threshold:
+                    self.stats.near += 1
+                    self._link(text, document_id, match)
+                    return True
+
+        kept = (document_id, None, len(self._kept))
+        for key in keys:
+            self._bands[key].append((signature, *kept))
+        self._exact[digest] = kept
+        self._kept.append((
+            document_id, digest, None if signature is None else signature.tobytes(), keys
+        ))
+        return False
+
+    def _link(self, text, document_id, match):
+        # match: (document_id, fingerprint_id, kept_index) of the copy
+        # kept, from this run (fingerprint_id None) or the library.
+        # Repeats within one document need no link: they go with it.
+        kept_document_id, fingerprint_id, kept_index = match
+        if fingerprint_id is not None or kept_document_id != document_id:
+            self._duplicates.append((document_id, fingerprint_id, kept_index, text))
+
+    def filter(self, chunks, document_id=None):
+        return list(self.iter_filter(chunks, document_id))
+
+    def iter_filter(self, chunks, document_id=None):
+        # Lazy variant for streamed chunks (bulk ingestion)
+        for chunk in chunks:
+            self.stats.total += 1
+            if not self.is_duplicate(chunk, document_id):
+                yield chunk
+
+    def save(self, document_ids=None):
+        # Persist fingerprints of the chunks kept since the last save,
+        # replacing those of document_ids (None: the whole library, after
+        # a full rebuild)
+        replace_chunk_fingerprints(self._kept, self._duplicates, document_ids)
+        self._reset()
+
+
+def restore_orphaned_duplicates(rag):
+    # Chunks dropped as copies of a chunk whose document has since been
+    # replaced or deleted are indexed again for their own documents,
+    # deduplicated against what the library holds now
+    orphans = get_orphaned_duplicates()
+    if not orphans:
+        return
+
+    by_document = defaultdict(list)
+    for _, document_id, text in orphans:
+        by_document[document_id].append(text)
+
+    deduplicator = Deduplicator()
+    deduplicator.check_library()
+    documents = [
+        (document_id, deduplicator.filter(texts, document_id))
+        for document_id, texts in by_document.items()
+    ]
+    documents = [(document_id, chunks) for document_id, chunks in documents if chunks]
+
+    if documents:
+        rag.add_documents(documents, lock_timeout=INTERACTIVE_WRITE_LOCK_TIMEOUT)
+    deduplicator.save(())
+    delete_duplicate_rows([duplicate_id for duplicate_id, _, _ in orphans])
\ No newline at end of file
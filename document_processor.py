@@ -1,15 +1,2 @@
-import PyPDF2
-
-def extract_text_from_pdf(file):
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
-
-
-def chunk_text(text, chunk_size=500, overlap=100):
-    chunks = []
-    for i in range(0, len(text), chunk_size - overlap):
-        chunks.append(text[i:i + chunk_size])
-    return chunks
\ No newline at end of file
+# Kept for older imports; extraction and chunking live in pdf_utils
+from backend.pdf_utils import extract_text_from_pdf, chunk_text
\ No newline at end of file
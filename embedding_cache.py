@@ -0,0 +1,110 @@
+import os
+import time
+import hashlib
+import numpy as np
+from backend.sqlite_cache import SQLiteCache
+
+EMBEDDING_CACHE_FILE = "embedding_cache.db"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_BATCH = 500
+
+
+def cache_key(model_name, text):
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteCache):
+
+    def __init__(self, path=EMBEDDING_CACHE_FILE, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(
+            path, "embeddings", "cache_key", "dimension INTEGER, vector BLOB", max_entries
+        )
+
+    # ==============================
+    # LOOKUP
+    # ==============================
+    def get_many(self, keys):
+        found = {}
+        if not keys:
+            return found
+
+        conn = self._connect()
+        unique_keys = list(set(keys))
+
+        for i in range(0, len(unique_keys), LOOKUP_BATCH):
+            batch = unique_keys[i:i + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT cache_key, dimension, vector FROM embeddings WHERE cache_key IN ({placeholders})",
+                batch
+            ).fetchall()
+
+            for key, dimension, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32, count=dimension)
+
+        if found:
+            self._touch(conn, found)
+            conn.commit()
+
+        conn.close()
+        return found
+
+    # ==============================
+    # STORE + EVICT
+    # ==============================
+    def put_many(self, keys, vectors):
+        if not keys:
+            return
+
+        now = time.time()
+        rows = [
+            (key, int(vector.shape[0]), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (cache_key, dimension, vector, last_used) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        self._evict(conn, now)
+        conn.commit()
+        conn.close()
+
+
+_default_cache = None
+
+
+def get_embedding_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = EmbeddingCache()
+    return _default_cache
+
+
+def encode_with_cache(encode, model_name, texts, cache=None):
+    # encode(texts) is only called for misses, so a fully cached batch
+    # never needs the model loaded
+    cache = cache or get_embedding_cache()
+
+    keys = [cache_key(model_name, text) for text in texts]
+    found = cache.get_many(keys)
+
+    # Encode each distinct missing text once, even if it repeats in the batch
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    if missing:
+        encoded = encode(list(missing.values()))
+        new_vectors = dict(zip(missing.keys(), encoded))
+        cache.put_many(list(new_vectors.keys()), list(new_vectors.values()))
+        found.update(new_vectors)
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    return np.vstack([found[key] for key in keys]).astype(np.float32)
\ No newline at end of file
@@ -1,6 +1,185 @@
-from sentence_transformers import SentenceTransformer
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-def generate_embeddings(text_chunks):
-    return model.encode(text_chunks)
\ No newline at end of file
+import os
+import threading
+import numpy as np
+from backend.embedding_cache import encode_with_cache
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# torch | onnx | onnx_int8 | openvino (see BACKENDS). Vectors differ
+# slightly between backends, so rebuild the library after switching.
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# 0 leaves the runtime default (all cores)
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+# Unit-length vectors make L2 ranking equal cosine ranking; changing
+# this also requires a rebuild
+EMBED_NORMALIZE = os.getenv("EMBED_NORMALIZE", "0") == "1"
+# float32 | float16; FAISS still receives float32
+EMBED_OUTPUT_DTYPE = os.getenv("EMBED_OUTPUT_DTYPE", "float32")
+
+# Pre-quantized ONNX export shipped in the model's hub repository
+ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx")
+
+
+# ==============================
+# BACKENDS
+# ==============================
+# Each loader returns an object with encode(texts, batch_size=...)
+# returning a 2-D array, like SentenceTransformer.
+
+def _load_torch(model_name, threads):
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def _onnx_kwargs(threads, file_name=None):
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if file_name:
+        model_kwargs["file_name"] = file_name
+
+    if threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        model_kwargs["session_options"] = session_options
+
+    return model_kwargs
+
+
+def _load_onnx(model_name, threads):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, backend="onnx", model_kwargs=_onnx_kwargs(threads))
+
+
+def _load_onnx_int8(model_name, threads):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(
+        model_name, backend="onnx", model_kwargs=_onnx_kwargs(threads, ONNX_INT8_FILE)
+    )
+
+
+def _load_openvino(model_name, threads):
+    from sentence_transformers import SentenceTransformer
+    model_kwargs = {"ov_config": {"INFERENCE_NUM_THREADS": str(threads)}} if threads else {}
+    return SentenceTransformer(model_name, backend="openvino", model_kwargs=model_kwargs)
+
+
+BACKENDS = {
+    "torch": _load_torch,
+    "onnx": _load_onnx,
+    "onnx_int8": _load_onnx_int8,
+    "openvino": _load_openvino,
+}
+
+
+def register_backend(name, loader):
+    BACKENDS[name] = loader
+
+
+# ==============================
+# ENGINE
+# ==============================
+
+class EmbeddingEngine:
+
+    def __init__(
+        self,
+        model_name=MODEL_NAME,
+        backend=EMBED_BACKEND,
+        batch_size=EMBED_BATCH_SIZE,
+        threads=EMBED_THREADS,
+        normalize=EMBED_NORMALIZE,
+        output_dtype=EMBED_OUTPUT_DTYPE
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = threads
+        self.normalize = normalize
+        self.output_dtype = np.dtype(output_dtype)
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_namespace(self):
+        # Cached vectors are only reused by an engine that would have
+        # produced the same numbers
+        namespace = self.model_name
+        if self.backend != "torch":
+            namespace += f":{self.backend}"
+        if self.normalize:
+            namespace += ":normalized"
+        return namespace
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = BACKENDS[self.backend](self.model_name, self.threads)
+        return self._model
+
+    def encode(self, texts, batch_size=None):
+        batch_size = batch_size or self.batch_size
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=self.output_dtype)
+
+        # Batches of similar length waste less time on padding tokens
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+
+        batches = [
+            np.asarray(
+                self.model.encode(sorted_texts[i:i + batch_size], batch_size=batch_size),
+                dtype=np.float32
+            )
+            for i in range(0, len(sorted_texts), batch_size)
+        ]
+
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.vstack(batches)
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+
+        return embeddings.astype(self.output_dtype, copy=False)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    # Loaded on first use (or by warmup) so importing this module is cheap
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EmbeddingEngine()
+
+    return _engine
+
+
+def get_model():
+    return get_engine().model
+
+
+def embed_texts(texts):
+    # Uncached; used for queries, which have their own cache
+    return get_engine().encode(texts)
+
+
+def generate_embeddings(text_chunks):
+    # Only chunks not seen before (by text + engine settings) hit the encoder
+    engine = get_engine()
+    return encode_with_cache(engine.encode, engine.cache_namespace, text_chunks)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Usage: python -m backend.import_budget [--login-budget 1.5] [--quiz-budget 2.0]
+#
+# Imports each page in a fresh interpreter, reports wall time and the
+# slowest modules (from -X importtime), and exits non-zero when a page
+# is over budget. Heavy models load lazily or in warmup, so neither page
+# should pull in sentence_transformers, torch or google.genai.
+
+PAGES = {
+    "login": "import runpy; runpy.run_path({path!r})",
+    "quiz": "import backend.quiz",
+}
+
+HEAVY_MODULES = ("sentence_transformers", "torch", "google.genai", "google.generativeai")
+
+
+def measure(label, code):
+    env = dict(os.environ, WARMUP_ON_START="0")
+    timed = f"import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"{label}: import failed\n{result.stderr[-2000:]}")
+
+    seconds = float(result.stdout.strip().splitlines()[-1])
+
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.strip()))
+
+    return seconds, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page import-time budget check")
+    parser.add_argument("--login-path", default="Login.py")
+    parser.add_argument("--login-budget", type=float, default=1.5)
+    parser.add_argument("--quiz-budget", type=float, default=2.0)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    budgets = {"login": args.login_budget, "quiz": args.quiz_budget}
+    over_budget = False
+
+    for label, code in PAGES.items():
+        seconds, modules = measure(label, code.format(path=args.login_path))
+        status = "OK" if seconds <= budgets[label] else "OVER BUDGET"
+        over_budget = over_budget or seconds > budgets[label]
+
+        print(f"{label}: {seconds:.2f}s (budget {budgets[label]:.2f}s) {status}")
+
+        loaded = {name for _, name in modules}
+        for heavy in HEAVY_MODULES:
+            if heavy in loaded:
+                print(f"  eagerly imports {heavy}")
+
+        for cumulative, name in sorted(modules, reverse=True)[:args.top]:
+            print(f"  {cumulative / 1e6:6.2f}s  {name}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
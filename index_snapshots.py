@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import shutil
+from backend.chunk_store import atomic_write
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_DIR = "faiss_snapshots"
+CURRENT_FILE = os.path.join(SNAPSHOT_DIR, "CURRENT")
+WRITE_LOCK_FILE = os.path.join(SNAPSHOT_DIR, "write.lock")
+
+SNAPSHOT_INDEX_FILE = "index.bin"
+SNAPSHOT_META_FILE = "chunks.npy"
+SNAPSHOT_MANIFEST_FILE = "manifest.json"
+
+KEEP_SNAPSHOTS = int(os.getenv("FAISS_KEEP_SNAPSHOTS", "3"))
+
+# Seconds a writer waits for the write lock. Bulk jobs can wait out
+# another rebuild; an upload from the UI gives up quickly instead of
+# freezing the page for as long as a rebuild holds the lock.
+WRITE_LOCK_TIMEOUT = float(os.getenv("SNAPSHOT_WRITE_LOCK_TIMEOUT", "300"))
+INTERACTIVE_WRITE_LOCK_TIMEOUT = float(os.getenv("SNAPSHOT_INTERACTIVE_LOCK_TIMEOUT", "5"))
+
+
+# ==============================
+# PATHS
+# ==============================
+
+def snapshot_path(version, name=""):
+    return os.path.join(SNAPSHOT_DIR, f"v{version}", name)
+
+
+def blob_path(version):
+    # A blob generation starts at a full rebuild and is appended to by
+    # every later snapshot until the next rebuild
+    return os.path.join(SNAPSHOT_DIR, f"chunks_v{version}.bin")
+
+
+# ==============================
+# CURRENT POINTER
+# ==============================
+
+def read_current_version():
+    try:
+        with open(CURRENT_FILE) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def publish_version(version):
+    atomic_write(CURRENT_FILE, lambda f: f.write(str(version).encode()))
+
+
+# ==============================
+# MANIFEST
+# ==============================
+
+def write_manifest(version, blob_file, has_index, dimension=None):
+    with open(snapshot_path(version, SNAPSHOT_MANIFEST_FILE), "w") as f:
+        json.dump({
+            "version": version,
+            "blob": os.path.basename(blob_file),
+            "has_index": has_index,
+            "dimension": dimension
+        }, f)
+
+
+def read_manifest(version):
+    with open(snapshot_path(version, SNAPSHOT_MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+# ==============================
+# CLEANUP
+# ==============================
+
+def prune_snapshots(keep=KEEP_SNAPSHOTS):
+    versions = sorted(
+        int(name[1:]) for name in os.listdir(SNAPSHOT_DIR)
+        if name.startswith("v") and name[1:].isdigit()
+    )
+    kept = versions[-keep:]
+
+    for version in versions[:-keep]:
+        shutil.rmtree(snapshot_path(version), ignore_errors=True)
+
+    used_blobs = set()
+    for version in kept:
+        try:
+            used_blobs.add(os.path.splitext(read_manifest(version)["blob"])[0])
+        except (FileNotFoundError, ValueError):
+            pass
+
+    # Text blobs (.bin) and their float16 vector files (.f16)
+    for name in os.listdir(SNAPSHOT_DIR):
+        stem, ext = os.path.splitext(name)
+        if stem.startswith("chunks_v") and ext in (".bin", ".f16") and stem not in used_blobs:
+            try:
+                os.remove(os.path.join(SNAPSHOT_DIR, name))
+            except OSError:
+                # Still mapped by a reader on platforms that forbid it
+                pass
+
+
+# ==============================
+# CROSS-PROCESS WRITE LOCK
+# ==============================
+
+class SnapshotWriteLock:
+    # OS-level lock on an open handle, so it works across worker processes
+    # and is released by the OS if the holder crashes. The lock file itself
+    # stays in place; it only records the last holder's pid.
+
+    def __init__(self, path=WRITE_LOCK_FILE, timeout=WRITE_LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        self._file = open(self.path, "a+")
+
+        while True:
+            try:
+                _lock_file(self._file)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self._file.close()
+                    self._file = None
+                    raise TimeoutError("Timed out waiting for the index write lock.")
+                time.sleep(0.1)
+
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(os.getpid()))
+        self._file.flush()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+if fcntl is not None:
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+else:
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from backend.pdf_utils import extract_text_from_pdf, chunk_text, file_fingerprint
+from backend.database import (
+    register_document,
+    get_document_id,
+    get_document_by_hash,
+    set_document_hash
+)
+from backend.dedup import Deduplicator, restore_orphaned_duplicates
+
+
+# ==============================
+# IDEMPOTENT PDF INGESTION
+# ==============================
+# Streamlit reruns the whole page on every click, so uploads are keyed
+# by content hash and only embedded the first time they are seen.
+# Returns (document_id, newly_indexed); document_id is None when the
+# PDF has no extractable text. Chunks repeated within the document or
+# already indexed from other documents are dropped before embedding
+# (and linked to the copy kept); pass a deduplicator to read its stats
+# afterwards.
+
+def ingest_pdf(rag, uploaded_file, indexed_fingerprints, replace_by_name=False, deduplicator=None):
+    fingerprint = file_fingerprint(uploaded_file)
+
+    if fingerprint in indexed_fingerprints:
+        return indexed_fingerprints[fingerprint], False
+
+    document_id = get_document_by_hash(fingerprint)
+
+    if document_id is not None and rag.is_document_indexed(document_id):
+        indexed_fingerprints[fingerprint] = document_id
+        return document_id, False
+
+    text = extract_text_from_pdf(uploaded_file)
+    if not text.strip():
+        return None, False
+
+    if document_id is None and replace_by_name:
+        document_id = get_document_id(uploaded_file.name)
+
+    if deduplicator is None:
+        deduplicator = Deduplicator()
+    deduplicator.check_library(exclude_document_id=document_id)
+
+    if document_id is None:
+        document_id = register_document(uploaded_file.name, fingerprint)
+        rag.add_document(document_id, deduplicator.filter(chunk_text(text), document_id))
+    else:
+        rag.replace_document(document_id, deduplicator.filter(chunk_text(text), document_id))
+        # Only once the new version is published; a failed replace must
+        # not make the old index look like the new upload
+        set_document_hash(document_id, fingerprint)
+    deduplicator.save([document_id])
+    # Other documents' chunks that were dropped as copies of the old
+    # version are indexed for those documents again
+    restore_orphaned_duplicates(rag)
+
+    indexed_fingerprints[fingerprint] = document_id
+    return document_id, True
\ No newline at end of file
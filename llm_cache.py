@@ -0,0 +1,197 @@
+import os
+import time
+import hashlib
+import threading
+from backend.sqlite_cache import SQLiteCache
+
+LLM_CACHE_FILE = "llm_cache.db"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+
+# Call types whose responses are cached; others only get coalescing.
+# Remove a type here (or from the env var) to opt it out.
+LLM_CACHE_CALL_TYPES = set(
+    filter(None, os.getenv("LLM_CACHE_CALL_TYPES", "question,adaptive_question,evaluation").split(","))
+)
+
+
+def normalize_prompt(prompt):
+    # Indentation and blank lines differ between call sites but not in
+    # meaning; case and wording are kept
+    return "\n".join(" ".join(line.split()) for line in prompt.strip().splitlines() if line.strip())
+
+
+def prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(SQLiteCache):
+
+    def __init__(self, path=LLM_CACHE_FILE, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL):
+        super().__init__(
+            path, "responses", "prompt_key",
+            "model TEXT, call_type TEXT, response TEXT, created REAL",
+            max_entries, ttl
+        )
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT response, created FROM responses WHERE prompt_key=?", (key,)
+        ).fetchone()
+
+        response = None
+        if row is not None:
+            if self._is_expired(row[1]):
+                self._delete(conn, key)
+            else:
+                response = row[0]
+                self._touch(conn, [key])
+            conn.commit()
+
+        conn.close()
+        return response
+
+    def delete(self, key):
+        conn = self._connect()
+        self._delete(conn, key)
+        conn.commit()
+        conn.close()
+
+    def put(self, key, model_name, call_type, response):
+        now = time.time()
+
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (prompt_key, model, call_type, response, created, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model_name, call_type, response, now, now)
+        )
+        self._evict(conn, now)
+        conn.commit()
+        conn.close()
+
+
+# ==============================
+# SINGLE-FLIGHT
+# ==============================
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution of fn; every
+    # caller gets its result or its exception
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+_default_cache = None
+_single_flight = SingleFlight()
+
+
+def get_llm_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache()
+    return _default_cache
+
+
+def _usable(response, validate):
+    # Empty replies, and replies the caller cannot use (validate raises),
+    # are never stored or served from the cache
+    if not response:
+        return False
+    if validate is None:
+        return True
+    try:
+        validate(response)
+        return True
+    except Exception:
+        return False
+
+
+def _cached_response(cache, key, validate):
+    response = cache.get(key)
+    if response is not None and not _usable(response, validate):
+        cache.delete(key)
+        return None
+    return response
+
+
+def cached_generate(generate, model_name, prompt, call_type=None, cache=None, validate=None):
+    # generate(prompt) is only called on a miss, and only once for any
+    # number of identical prompts in flight at the same time. validate
+    # (e.g. the parser of the reply) decides whether a reply is cached.
+    key = prompt_key(model_name, prompt)
+    use_cache = call_type in LLM_CACHE_CALL_TYPES
+    cache = (cache or get_llm_cache()) if use_cache else None
+
+    def fetch():
+        if cache is not None:
+            response = _cached_response(cache, key, validate)
+            if response is not None:
+                return response
+
+        response = generate(prompt)
+
+        if cache is not None and _usable(response, validate):
+            cache.put(key, model_name, call_type, response)
+        return response
+
+    return _single_flight.do(key, fetch)
+
+
+def cached_stream(stream, model_name, prompt, call_type=None, cache=None, validate=None):
+    # Generator over text deltas from stream(prompt); a cached response
+    # is yielded in one piece and a completed stream is stored if it
+    # passes validate. Streams are not coalesced, since each caller
+    # renders its own deltas.
+    key = prompt_key(model_name, prompt)
+    use_cache = call_type in LLM_CACHE_CALL_TYPES
+    cache = (cache or get_llm_cache()) if use_cache else None
+
+    if cache is not None:
+        response = _cached_response(cache, key, validate)
+        if response is not None:
+            yield response
+            return
+
+    parts = []
+    for delta in stream(prompt):
+        parts.append(delta)
+        yield delta
+
+    response = "".join(parts).strip()
+    if cache is not None and _usable(response, validate):
+        cache.put(key, model_name, call_type, response)
\ No newline at end of file
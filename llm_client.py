@@ -0,0 +1,294 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_MODEL = "gemini-2.5-flash"
+
+# Quota shaping for the whole process: a token bucket refilled at
+# LLM_REQUESTS_PER_MINUTE (bursts up to LLM_BURST) plus a cap on calls
+# in flight at once
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+# Quota, overload and gateway errors are worth another attempt
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+# Async callers poll for a concurrency slot at this interval
+SLOT_POLL_INTERVAL = 0.01
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # google.genai is imported on first use so pages that never call the
+    # LLM do not pay for it at startup
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                _client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+    return _client
+
+
+# ==============================
+# ERRORS
+# ==============================
+
+class LLMError(Exception):
+    # The LLM could not produce an answer; callers must not invent one
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMRateLimitError(LLMError):
+    pass
+
+
+class LLMTimeoutError(LLMError):
+    pass
+
+
+# ==============================
+# RATE LIMITING
+# ==============================
+
+class TokenBucket:
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Takes a token and returns how long to wait before using it;
+        # reserving ahead keeps waiting callers in arrival order
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self.reserve())
+
+
+def retry_after_seconds(error):
+    # Retry-After header, or Gemini's RetryInfo detail ("retryDelay": "37s")
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+
+    if value is None:
+        details = getattr(error, "details", None)
+        if isinstance(details, dict):
+            for detail in details.get("error", {}).get("details", []):
+                if isinstance(detail, dict) and "retryDelay" in detail:
+                    value = str(detail["retryDelay"]).rstrip("s")
+
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+# ==============================
+# CLIENT
+# ==============================
+
+class LLMClient:
+
+    def __init__(
+        self,
+        model=LLM_MODEL,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        burst=LLM_BURST,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        backoff_base=LLM_BACKOFF_BASE,
+        backoff_max=LLM_BACKOFF_MAX
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._bucket = TokenBucket(requests_per_minute / 60, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _config(self, timeout, config=None):
+        from google.genai import types
+
+        config = dict(config or {})
+        config["http_options"] = types.HttpOptions(timeout=int(timeout * 1000))
+        return types.GenerateContentConfig(**config)
+
+    def _classify(self, error):
+        # Returns (LLMError to raise, retryable)
+        from google.genai.errors import APIError
+
+        if isinstance(error, LLMError):
+            return error, isinstance(error, (LLMRateLimitError, LLMTimeoutError))
+        if isinstance(error, APIError):
+            if error.code == 429:
+                return LLMRateLimitError(f"LLM quota exceeded: {error.message}", 429), True
+            return LLMError(f"LLM request failed ({error.code}): {error.message}", error.code), \
+                error.code in RETRYABLE_STATUS
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "timeout" in type(error).__name__.lower():
+            return LLMTimeoutError(f"LLM call timed out after {self.timeout:.0f}s"), True
+        return LLMError(f"LLM request failed: {error}"), False
+
+    def _backoff(self, attempt, error):
+        # Full jitter, but never sooner than the server asked for
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    @staticmethod
+    def _text(response):
+        return response.text.strip() if response.text else ""
+
+    # ==============================
+    # SYNC
+    # ==============================
+    def generate(self, prompt, timeout=None, config=None):
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+
+            with self._slots:
+                try:
+                    response = get_client().models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=self._config(timeout, config)
+                    )
+                    return self._text(response)
+                except Exception as e:
+                    error, retryable = self._classify(e)
+                    cause = e
+
+            if not retryable or attempt == self.max_retries:
+                raise error from cause
+            time.sleep(self._backoff(attempt, cause))
+
+    # ==============================
+    # STREAMING
+    # ==============================
+    def generate_stream(self, prompt, timeout=None, config=None):
+        # Yields text deltas as they arrive. Failures before the first
+        # delta are retried like generate(); after that a retry would
+        # repeat text already shown, so the error is raised instead.
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+            self._slots.acquire()
+            started = False
+
+            try:
+                stream = get_client().models.generate_content_stream(
+                    model=self.model,
+                    contents=prompt,
+                    config=self._config(timeout, config)
+                )
+                for chunk in stream:
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+                return
+            except Exception as e:
+                error, retryable = self._classify(e)
+                cause = e
+            finally:
+                self._slots.release()
+
+            if started or not retryable or attempt == self.max_retries:
+                raise error from cause
+            time.sleep(self._backoff(attempt, cause))
+
+    # ==============================
+    # ASYNC
+    # ==============================
+    async def agenerate(self, prompt, timeout=None, config=None):
+        # Shares the rate limit and concurrency cap with generate()
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire_async()
+            await self._acquire_slot_async()
+
+            try:
+                response = await asyncio.wait_for(
+                    get_client().aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=self._config(timeout, config)
+                    ),
+                    timeout
+                )
+                return self._text(response)
+            except Exception as e:
+                error, retryable = self._classify(e)
+                cause = e
+            finally:
+                self._slots.release()
+
+            if not retryable or attempt == self.max_retries:
+                raise error from cause
+            await asyncio.sleep(self._backoff(attempt, cause))
+
+    async def _acquire_slot_async(self):
+        # Polls instead of blocking in a worker thread: a thread still
+        # waiting when its caller is cancelled would take the slot later
+        # and never release it
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    async def agenerate_many(self, prompts, timeout=None, config=None):
+        return await asyncio.gather(*(self.agenerate(p, timeout, config) for p in prompts))
+
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    # One limiter per process, shared by every session
+    global _llm_client
+
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
+
+    return _llm_client
\ No newline at end of file
@@ -1,18 +1,172 @@
-import PyPDF2
-
-
-def extract_text_from_pdf(file):
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        extracted = page.extract_text()
-        if extracted:
-            text += extracted
-    return text
-
-
-def chunk_text(text, chunk_size=500, overlap=100):
-    chunks = []
-    for i in range(0, len(text), chunk_size - overlap):
-        chunks.append(text[i:i + chunk_size])
-    return chunks
\ No newline at end of file
+import re
+import hashlib
+import PyPDF2
+
+
+def iter_pdf_pages(file, start=0, stop=None):
+    # Yields page text lazily; pages without extractable text are skipped
+    reader = PyPDF2.PdfReader(file)
+    for page in reader.pages[start:stop]:
+        extracted = page.extract_text()
+        if extracted:
+            yield extracted
+
+
+def count_pdf_pages(file):
+    return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_text_from_pdf(file):
+    # Newline between pages so the chunker never glues words across them
+    return "\n".join(iter_pdf_pages(file))
+
+
+def file_fingerprint(file):
+    # Content hash, so a renamed or re-uploaded copy is recognised
+    file.seek(0)
+    digest = hashlib.sha256(file.read()).hexdigest()
+    file.seek(0)
+    return digest
+
+
+# ==============================
+# CHUNKING
+# ==============================
+# all-MiniLM-L6-v2 truncates at 256 word pieces, so chunks are sized in
+# (estimated) tokens and cut at line/sentence ends, never mid-word.
+# Chunks are produced as (start, end) offsets into the source text.
+
+CHUNK_MAX_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 40
+
+UNIT_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+WORD = re.compile(r"\S+")
+NON_SPACE = re.compile(r"\S")
+TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text, start=0, end=None):
+    # WordPiece splits long or rare words; allow one extra piece per 6 chars
+    end = len(text) if end is None else end
+    return sum(1 + (m.end() - m.start()) // 6 for m in TOKEN.finditer(text, start, end))
+
+
+def _iter_units(text, max_tokens, base=0):
+    # Sentences / lines as (start, end, tokens, ends_sentence)
+    start = 0
+    for match in UNIT_BREAK.finditer(text):
+        yield from _split_unit(text, start, match.start(), max_tokens, base)
+        start = match.end()
+    yield from _split_unit(text, start, len(text), max_tokens, base)
+
+
+def _split_unit(text, start, end, max_tokens, base):
+    first = NON_SPACE.search(text, start, end)
+    if first is None:
+        return
+
+    start = first.start()
+    while text[end - 1].isspace():
+        end -= 1
+
+    tokens = estimate_tokens(text, start, end)
+    if tokens <= max_tokens:
+        yield base + start, base + end, tokens, text[end - 1] in ".!?"
+        return
+
+    # Over-long run (tables, text without punctuation): cut between words
+    piece_start = None
+    piece_tokens = 0
+    for word in WORD.finditer(text, start, end):
+        word_tokens = estimate_tokens(text, word.start(), word.end())
+        if piece_start is not None and piece_tokens + word_tokens > max_tokens:
+            yield base + piece_start, base + piece_end, piece_tokens, False
+            piece_start = None
+        if piece_start is None:
+            piece_start, piece_tokens = word.start(), 0
+        piece_tokens += word_tokens
+        piece_end = word.end()
+
+    if piece_start is not None:
+        yield base + piece_start, base + piece_end, piece_tokens, text[piece_end - 1] in ".!?"
+
+
+def _pack_units(units, max_tokens, overlap_tokens):
+    window = []
+    window_tokens = 0
+    carried = 0
+
+    for unit in units:
+        while window and window_tokens + unit[2] > max_tokens:
+            if carried == len(window):
+                # Only overlap left; never emit a chunk with nothing new
+                window, window_tokens, carried = [], 0, 0
+                break
+
+            cut = _best_cut(window, carried, max_tokens)
+            yield window[0][0], window[cut - 1][1]
+
+            overlap = _overlap_tail(window[:cut], overlap_tokens)
+            window = overlap + window[cut:]
+            window_tokens = sum(u[2] for u in window)
+            carried = len(overlap)
+
+        window.append(unit)
+        window_tokens += unit[2]
+
+    if len(window) > carried:
+        yield window[0][0], window[-1][1]
+
+
+def _best_cut(window, carried, max_tokens):
+    # Prefer ending on a full sentence once the chunk is half full
+    cut = len(window)
+    tokens = 0
+    for i, unit in enumerate(window, 1):
+        tokens += unit[2]
+        if i > carried and unit[3] and tokens >= max_tokens // 2:
+            cut = i
+    return cut
+
+
+def _overlap_tail(units, overlap_tokens):
+    tail = []
+    tokens = 0
+    for unit in reversed(units[1:]):
+        if tokens + unit[2] > overlap_tokens:
+            break
+        tail.append(unit)
+        tokens += unit[2]
+    return tail[::-1]
+
+
+def iter_chunk_spans(text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    return _pack_units(_iter_units(text, max_tokens), max_tokens, overlap_tokens)
+
+
+def chunk_text(text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    return [text[start:end] for start, end in iter_chunk_spans(text, max_tokens, overlap_tokens)]
+
+
+def iter_chunks(pages, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    # Chunks a stream of page texts, keeping only the text from the
+    # start of the latest chunk onwards in memory
+    buffer = ""
+    base = 0
+
+    def units():
+        nonlocal buffer
+        offset = 0
+        for page in pages:
+            piece = page + "\n"
+            buffer += piece
+            yield from _iter_units(piece, max_tokens, offset)
+            offset += len(piece)
+
+    for start, end in _pack_units(units(), max_tokens, overlap_tokens):
+        yield buffer[start - base:end - base]
+
+        # Trim the consumed prefix once it dominates, to stay linear
+        if start - base > len(buffer) // 2:
+            buffer = buffer[start - base:]
+            base = start
\ No newline at end of file
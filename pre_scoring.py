@@ -0,0 +1,84 @@
+import os
+import re
+import numpy as np
+
+# Clear-cut answers are graded here without an LLM call; anything not
+# matched with confidence returns None and goes to Gemini
+PRESCORE_ENABLED = os.getenv("PRESCORE_ENABLED", "1") == "1"
+
+# Share of the answer's 5-word shingles found verbatim in the context
+PRESCORE_COPY_CONTAINMENT = float(os.getenv("PRESCORE_COPY_CONTAINMENT", "0.9"))
+PRESCORE_COPY_MIN_WORDS = int(os.getenv("PRESCORE_COPY_MIN_WORDS", "25"))
+
+# Best cosine similarity to the question or the context below which an
+# answer is treated as off-topic (all-MiniLM puts unrelated text near 0)
+PRESCORE_OFF_TOPIC_SIMILARITY = float(os.getenv("PRESCORE_OFF_TOPIC_SIMILARITY", "0.1"))
+PRESCORE_OFF_TOPIC_MIN_WORDS = 4
+
+WORD = re.compile(r"\w+")
+
+# Only phrases that never answer a question; "none", "nothing" or "n/a"
+# can be correct answers ("What extra fee applies...?")
+NON_ANSWERS = re.compile(
+    r"^(?:i\s*(?:do\s*n[o']?t|dont|don t)\s*know|idk|no\s*idea|not\s*sure|i\s*am\s*not\s*sure|"
+    r"i'?m\s*not\s*sure|no\s*clue|pass|skip|\?+|-+|\.+)$"
+)
+
+
+def _words(text):
+    return WORD.findall(text.lower())
+
+
+def _shingles(words, size=5):
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _result(score, correctness, weak_concept, explanation):
+    return {
+        "score": score,
+        "correctness": correctness,
+        "weak_concept": weak_concept,
+        "explanation": explanation,
+        "followup_question": None,
+        "prescored": True
+    }
+
+
+def prescore_answer(context, question, answer, topic=None, embed=None):
+    # Returns an evaluation result for clear-cut cases, else None.
+    # embed(texts) -> vectors enables the off-topic check.
+    weak_concept = (topic or "").strip() or "Unknown"
+    text = " ".join((answer or "").split())
+    words = _words(text)
+
+    if not words:
+        return _result(0, "Incorrect", weak_concept, "No answer was given.")
+
+    if NON_ANSWERS.match(text.lower().strip(" .!")):
+        return _result(0, "Incorrect", weak_concept, "The answer does not attempt the question.")
+
+    # Only a verbatim copy counts: an affirmative answer to a yes/no
+    # question reuses the question's words in another order
+    if len(words) >= 4 and words == _words(question or ""):
+        return _result(0, "Incorrect", weak_concept, "The answer repeats the question instead of answering it.")
+
+    if len(words) >= PRESCORE_COPY_MIN_WORDS:
+        answer_shingles = _shingles(words)
+        context_shingles = _shingles(_words(context or ""))
+        if answer_shingles:
+            containment = len(answer_shingles & context_shingles) / len(answer_shingles)
+            if containment >= PRESCORE_COPY_CONTAINMENT:
+                return _result(
+                    1, "Incorrect", weak_concept,
+                    "The answer copies the study material instead of answering in your own words."
+                )
+
+    if embed is not None and len(words) >= PRESCORE_OFF_TOPIC_MIN_WORDS:
+        vectors = np.asarray(embed([text, question or "", context or ""]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = float(max(vectors[0] @ vectors[1], vectors[0] @ vectors[2]))
+
+        if similarity < PRESCORE_OFF_TOPIC_SIMILARITY:
+            return _result(0, "Incorrect", weak_concept, "The answer is unrelated to the question.")
+
+    return None
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+import time
+import queue
+import threading
+
+# A batch is closed when it reaches QUERY_BATCH_MAX_SIZE requests or
+# QUERY_BATCH_MAX_WAIT_MS after its first request arrived, whichever
+# comes first. 0 ms still batches requests that queued up while the
+# previous batch was running, without holding anyone back.
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _Request:
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class QueryBatcher:
+    # Collects items submitted concurrently from many threads and hands
+    # them to process_batch(items) -> results (same order) in one call.
+    # Each caller blocks until its own result is ready; an exception
+    # from process_batch is raised in every caller of that batch.
+
+    def __init__(self, process_batch, max_batch_size=QUERY_BATCH_MAX_SIZE,
+                 max_wait_ms=QUERY_BATCH_MAX_WAIT_MS, name="query-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, item, timeout=None):
+        if self.max_batch_size == 1:
+            return self.process_batch([item])[0]
+
+        self._ensure_thread()
+        request = _Request(item)
+        self._queue.put(request)
+
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"{self.name}: no result within {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.items += len(batch)
+
+            try:
+                results = self.process_batch([request.item for request in batch])
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            for request in batch:
+                request.done.set()
\ No newline at end of file
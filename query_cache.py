@@ -0,0 +1,50 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    # The embedding model is uncased, so case and spacing never change
+    # the vector; "FUP", " fup " and "Fup" share one cache entry
+    return " ".join(query.lower().split())
+
+
+class TTLCache:
+    # Thread-safe LRU cache whose entries also expire after ttl seconds
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
\ No newline at end of file
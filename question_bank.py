@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+from collections import defaultdict
+from backend.query_cache import normalize_query
+from backend.database import (
+    store_bank_questions,
+    count_bank_questions,
+    get_bank_question_texts,
+    take_bank_question,
+    prune_bank_questions,
+    get_recent_topics
+)
+
+# A topic is topped up to QUESTION_BANK_TARGET whenever fewer than
+# QUESTION_BANK_LOW_WATERMARK servable questions remain
+QUESTION_BANK_LOW_WATERMARK = int(os.getenv("QUESTION_BANK_LOW_WATERMARK", "5"))
+QUESTION_BANK_TARGET = int(os.getenv("QUESTION_BANK_TARGET", "15"))
+QUESTION_BANK_BATCH = int(os.getenv("QUESTION_BANK_BATCH", "5"))
+# Successive batches for a topic are generated from different slices of
+# its ranked chunks, cycling through this many, so the pool covers more
+# than the few best matches
+QUESTION_BANK_CHUNK_WINDOWS = int(os.getenv("QUESTION_BANK_CHUNK_WINDOWS", "4"))
+
+# Freshness: questions older than this are not served and each is
+# shown to at most QUESTION_BANK_MAX_SERVES users. Questions whose
+# source documents changed since generation are never served.
+QUESTION_BANK_MAX_AGE_HOURS = int(os.getenv("QUESTION_BANK_MAX_AGE_HOURS", "168"))
+QUESTION_BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", "20"))
+
+QUESTION_BANK_WARM_TOPICS = int(os.getenv("QUESTION_BANK_WARM_TOPICS", "20"))
+
+
+class QuestionBank:
+    # Serves pre-generated questions and refills pools in a background
+    # thread; rag supplies retrieval and generate_questions()
+
+    def __init__(self, rag):
+        self.rag = rag
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._queued_lock = threading.Lock()
+        self._thread = None
+        # Batches generated per topic; only the refill thread uses it
+        self._batches = defaultdict(int)
+
+    def take(self, user_id, topic):
+        # (question, context) or None; never blocks on the LLM
+        topic = normalize_query(topic)
+        served = take_bank_question(
+            user_id, topic, QUESTION_BANK_MAX_AGE_HOURS, QUESTION_BANK_MAX_SERVES
+        )
+        self.request_refill(topic)
+        return served
+
+    def warm(self, topics=None):
+        # Tops up recently practised topics, e.g. at process start
+        prune_bank_questions(QUESTION_BANK_MAX_AGE_HOURS)
+        for topic in topics if topics is not None else get_recent_topics(QUESTION_BANK_WARM_TOPICS):
+            self.request_refill(topic)
+
+    def request_refill(self, topic):
+        topic = normalize_query(topic)
+
+        with self._queued_lock:
+            if topic in self._queued:
+                return
+            self._queued.add(topic)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="question-bank", daemon=True)
+                self._thread.start()
+
+        self._queue.put(topic)
+
+    def _run(self):
+        while True:
+            topic = self._queue.get()
+            try:
+                self.refill(topic)
+            except Exception:
+                # LLM or index unavailable; the next request retries
+                pass
+            finally:
+                with self._queued_lock:
+                    self._queued.discard(topic)
+
+    def refill(self, topic):
+        available = count_bank_questions(topic, QUESTION_BANK_MAX_AGE_HOURS, QUESTION_BANK_MAX_SERVES)
+        if available >= QUESTION_BANK_LOW_WATERMARK:
+            return 0
+
+        added = 0
+        while available + added < QUESTION_BANK_TARGET:
+            count = min(QUESTION_BANK_BATCH, QUESTION_BANK_TARGET - available - added)
+            window = self._batches[topic] % QUESTION_BANK_CHUNK_WINDOWS
+            self._batches[topic] += 1
+            questions, context, document_ids, version = self.rag.generate_questions(
+                topic, count, avoid=get_bank_question_texts(topic), window=window
+            )
+            if not questions:
+                break
+
+            store_bank_questions(topic, questions, context, document_ids, version)
+            added += len(questions)
+
+        return added
\ No newline at end of file
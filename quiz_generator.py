@@ -1,20 +1,30 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-model = genai.GenerativeModel("gemini-pro")
-
-def generate_question(context):
-    prompt = f"""
-    Using ONLY the telecom context below,
-    generate one clear quiz question.
-
-    Context:
-    {context}
-    """
-
-    response = model.generate_content(prompt)
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_model = None
+
+
+def get_model():
+    # Configured on first use so importing this module stays cheap
+    global _model
+
+    if _model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _model = genai.GenerativeModel("gemini-pro")
+
+    return _model
+
+def generate_question(context):
+    prompt = f"""
+    Using ONLY the telecom context below,
+    generate one clear quiz question.
+
+    Context:
+    {context}
+    """
+
+    response = get_model().generate_content(prompt)
     return response.text
\ No newline at end of file
@@ -1,176 +1,954 @@
-import os
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from google import genai
-from google.genai.errors import ClientError
-from dotenv import load_dotenv
-import json
-import re
-
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-
-INDEX_FILE = "faiss_index.bin"
-
-
-class RAGPipeline:
-
-    def __init__(self):
-        self.index = None
-        self.text_chunks = []
-
-        if os.path.exists(INDEX_FILE):
-            self.index = faiss.read_index(INDEX_FILE)
-
-    # ==============================
-    # CREATE EMBEDDINGS
-    # ==============================
-    def create_embeddings(self, chunks):
-        self.text_chunks = chunks
-        embeddings = embed_model.encode(chunks)
-        dimension = embeddings.shape[1]
-
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(np.array(embeddings))
-
-        faiss.write_index(self.index, INDEX_FILE)
-
-    # ==============================
-    # RETRIEVE CONTEXT
-    # ==============================
-    def retrieve_context(self, query, top_k=3):
-
-        if self.index is None:
-            raise ValueError("FAISS index not initialized.")
-
-        query_embedding = embed_model.encode([query])
-        distances, indices = self.index.search(np.array(query_embedding), top_k)
-
-        retrieved = [self.text_chunks[i] for i in indices[0]]
-        return "\n".join(retrieved)
-
-    # ==============================
-    # SAFE LLM CALL (Presentation Mode)
-    # ==============================
-    def call_llm(self, prompt):
-
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
-
-            return response.text.strip() if response.text else ""
-
-        except ClientError as e:
-
-            if "429" in str(e):
-
-                # If evaluation prompt → must return valid JSON
-                if "evaluation engine" in prompt.lower():
-                    return """
-                    {
-                        "score": 7,
-                        "correctness": "Partial",
-                        "weak_concept": "Telecom Concept",
-                        "explanation": "We are currently using Gemini free tier. For production deployment, billing-enabled quota will be used."
-                    }
-                    """
-                else:
-                    return "We are currently using Gemini free tier. For production deployment, billing-enabled quota will be used."
-
-            return "LLM service temporarily unavailable."
-
-        except Exception:
-            return "LLM service temporarily unavailable."
-
-    # ==============================
-    # GENERATE QUESTION
-    # ==============================
-    def generate_question(self, topic):
-
-        context = self.retrieve_context(topic)
-
-        prompt = f"""
-Generate one telecom quiz question from the context below.
-
-Context:
-{context}
-"""
-
-        question = self.call_llm(prompt)
-        return question, context
-
-    # ==============================
-    # ADAPTIVE QUESTION
-    # ==============================
-    def generate_adaptive_question(self, weak_concept):
-
-        context = self.retrieve_context(weak_concept)
-
-        prompt = f"""
-User is weak in {weak_concept}.
-Generate a reinforcement telecom question.
-
-Context:
-{context}
-"""
-
-        question = self.call_llm(prompt)
-        return question, context
-
-    # ==============================
-    # SAFE EVALUATION
-    # ==============================
-    def evaluate_answer(self, context, question, answer):
-
-        prompt = f"""
-You are an evaluation engine.
-
-Context:
-{context}
-
-Question:
-{question}
-
-User Answer:
-{answer}
-
-Return ONLY valid JSON.
-Do NOT include markdown.
-Do NOT include backticks.
-Do NOT include explanation outside JSON.
-
-Format:
-{{
-    "score": integer between 0 and 10,
-    "correctness": "Correct" or "Partial" or "Incorrect",
-    "weak_concept": "short concept name",
-    "explanation": "brief explanation"
-}}
-"""
-
-        raw_response = self.call_llm(prompt)
-
-        try:
-            cleaned = re.sub(r"```json", "", raw_response)
-            cleaned = re.sub(r"```", "", cleaned).strip()
-
-            match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-
-            if match:
-                json_text = match.group()
-                return json.loads(json_text)
-            else:
-                raise ValueError("No JSON found")
-
-        except Exception:
-            return {
-                "score": 0,
-                "correctness": "Incorrect",
-                "weak_concept": "Unknown",
-                "explanation": "Evaluation parsing failed. Please retry."
-            }
\ No newline at end of file
+import os
+import shutil
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from backend.chunk_store import ChunkStore
+from backend.vector_store import (
+    create_id_index,
+    save_index,
+    load_index,
+    maybe_rebuild,
+    remove_vectors,
+    is_quantized,
+    candidate_count,
+    MMAP_INDEX
+)
+from backend.database import (
+    store_chunks,
+    delete_chunks,
+    delete_chunks_before,
+    delete_chunk_ids,
+    get_max_chunk_id,
+    get_chunk_ids,
+    get_max_document_version,
+    set_document_version,
+    has_indexed_chunks
+)
+from backend.embedding_engine import embed_texts, generate_embeddings
+from backend.llm_client import get_llm_client, LLMError
+from backend.llm_cache import cached_generate, cached_stream
+from backend.rw_lock import ReadWriteLock
+from backend.query_cache import TTLCache, normalize_query
+from backend.query_batcher import QueryBatcher
+from backend.context_builder import build_context, ContextStats
+from backend.dedup import restore_orphaned_duplicates
+from backend.question_bank import QuestionBank
+from backend.pre_scoring import prescore_answer, PRESCORE_ENABLED
+from backend.batch_evaluation import (
+    EVAL_BATCH_SIZE,
+    EVAL_BATCH_WORKERS,
+    EVALUATION_CONFIG,
+    build_batch_prompt,
+    parse_batch_response
+)
+from backend.retrieval_client import RetrievalClient, RETRIEVAL_SERVER_URL
+from backend.index_snapshots import (
+    SNAPSHOT_DIR,
+    SNAPSHOT_INDEX_FILE,
+    SNAPSHOT_META_FILE,
+    SnapshotWriteLock,
+    WRITE_LOCK_TIMEOUT,
+    INTERACTIVE_WRITE_LOCK_TIMEOUT,
+    snapshot_path,
+    blob_path,
+    read_current_version,
+    publish_version,
+    write_manifest,
+    read_manifest,
+    prune_snapshots
+)
+
+load_dotenv()
+
+# How often a worker checks the CURRENT pointer for a newer snapshot
+RELOAD_INTERVAL = float(os.getenv("FAISS_RELOAD_INTERVAL", "2"))
+
+# Bulk ingestion: encoder batch size and chunks applied to the index at once
+EMBED_BATCH_SIZE = 256
+BULK_COMMIT_CHUNKS = int(os.getenv("BULK_COMMIT_CHUNKS", "50000"))
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+
+_shared_pipeline = None
+_shared_pipeline_lock = threading.Lock()
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+EVALUATION_MARKER = "===GRADE==="
+
+
+def question_prompt(context):
+    return f"""
+Generate one telecom quiz question from the context below.
+
+Context:
+{context}
+"""
+
+
+def followup_field(with_followup):
+    # Extra evaluation field: the adaptive follow-up question, written in
+    # the same call
+    if not with_followup:
+        return ""
+    return (
+        ',\n    "followup_question": "if score is below 6, one reinforcement telecom '
+        'question on the weak concept, answerable from the context; otherwise an empty string"'
+    )
+
+
+def parse_evaluation(raw_response):
+    try:
+        cleaned = re.sub(r"```json", "", raw_response)
+        cleaned = re.sub(r"```", "", cleaned).strip()
+
+        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
+
+        if match:
+            json_text = match.group()
+            result = json.loads(json_text)
+        else:
+            raise ValueError("No JSON found")
+
+        result["score"] = int(result["score"])
+        result["correctness"] = str(result["correctness"])
+        result["weak_concept"] = str(result["weak_concept"])
+        result.setdefault("explanation", "")
+        result["followup_question"] = str(result.get("followup_question") or "").strip() or None
+        return result
+
+    except (ValueError, KeyError, TypeError) as e:
+        raise LLMError(f"Evaluation response could not be parsed: {e}")
+
+
+def parse_streamed_evaluation(raw_response):
+    # Whole-text counterpart of EvaluationStream, used to validate a
+    # streamed reply before it is cached
+    _, marker, grade = raw_response.partition(EVALUATION_MARKER)
+    if not marker:
+        raise LLMError("Evaluation response could not be parsed: grade marker missing")
+    return parse_evaluation(grade)
+
+
+class EvaluationStream:
+    # Iterates explanation deltas up to EVALUATION_MARKER; once exhausted,
+    # .result holds the parsed evaluation with the streamed explanation
+
+    def __init__(self, deltas, result=None):
+        self._deltas = deltas
+        self.result = result
+        self.explanation = result["explanation"] if result else ""
+
+    def __iter__(self):
+        if self.result is not None:
+            if self.explanation:
+                yield self.explanation
+            return
+
+        pending = ""
+        grade = None
+        explanation = []
+
+        for delta in self._deltas:
+            if grade is not None:
+                grade.append(delta)
+                continue
+
+            pending += delta
+            marker = pending.find(EVALUATION_MARKER)
+            if marker != -1:
+                explanation.append(pending[:marker])
+                yield pending[:marker]
+                grade = [pending[marker + len(EVALUATION_MARKER):]]
+                continue
+
+            # Hold back anything that could be the start of the marker
+            safe = len(pending) - len(EVALUATION_MARKER) + 1
+            if safe > 0:
+                explanation.append(pending[:safe])
+                yield pending[:safe]
+                pending = pending[safe:]
+
+        if grade is None:
+            raise LLMError("Evaluation response could not be parsed: grade marker missing")
+
+        result = parse_evaluation("".join(grade))
+        self.explanation = "".join(explanation).strip()
+        result["explanation"] = self.explanation
+        self.result = result
+
+
+class RAGPipeline:
+
+    def __init__(self, retrieval_server_url=RETRIEVAL_SERVER_URL, mmap_index=MMAP_INDEX):
+        self.index = None
+        self.chunk_store = None
+        self.version = None
+        self._lock = ReadWriteLock()
+        self._last_reload_check = 0.0
+
+        # normalized query -> embedding, (query, top_k, version) -> chunk ids
+        self._query_embeddings = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        self._query_results = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+        # Tokens trimmed from prompts by the context builder
+        self.context_stats = ContextStats()
+
+        # Concurrent searches share one encode and one index.search
+        self.query_batcher = QueryBatcher(self._retrieve_batch, name="retrieval-batcher")
+
+        # Pre-generated questions, refilled in the background
+        self.question_bank = QuestionBank(self)
+
+        # With a retrieval server, searches go over the socket and the
+        # index is only loaded here when this process writes or the
+        # server is unreachable
+        self._retrieval_client = None
+        if retrieval_server_url:
+            self._retrieval_client = RetrievalClient(retrieval_server_url)
+        self._mmap_index = mmap_index
+
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        if self._retrieval_client is None:
+            self.reload(force=True)
+
+    # ==============================
+    # SNAPSHOT LOADING (hot reload)
+    # ==============================
+    # Every change is written as a new versioned snapshot and published
+    # through the CURRENT pointer; other workers notice the new version
+    # on their next search and swap it in.
+    def reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < RELOAD_INTERVAL:
+            return False
+        self._last_reload_check = now
+
+        version = read_current_version()
+        if version is None or version == self.version:
+            return False
+
+        try:
+            index, chunk_store = self._load_snapshot(version)
+        except FileNotFoundError:
+            # Pruned by a newer writer; the next check picks that one up
+            return False
+
+        self._swap(index, chunk_store, version)
+        return True
+
+    def _load_snapshot(self, version):
+        manifest = read_manifest(version)
+        chunk_store = ChunkStore(
+            os.path.join(SNAPSHOT_DIR, manifest["blob"]),
+            snapshot_path(version, SNAPSHOT_META_FILE),
+            manifest.get("dimension")
+        )
+
+        index = None
+        if manifest["has_index"]:
+            index = load_index(snapshot_path(version, SNAPSHOT_INDEX_FILE), self._mmap_index)
+
+        return index, chunk_store
+
+    def _swap(self, index, chunk_store, version):
+        with self._lock.write():
+            # A slow reload must never replace a newer snapshot
+            if self.version is not None and version <= self.version:
+                chunk_store.close()
+                return
+
+            old_store = self.chunk_store
+            self.index = index
+            self.chunk_store = chunk_store
+            self.version = version
+
+            # Results are keyed by version anyway; drop the stale ones
+            self._query_results.clear()
+
+        if old_store is not None:
+            old_store.close()
+
+    # ==============================
+    # SNAPSHOT WRITING
+    # ==============================
+    # Writers from any process are serialised by a lock file. The change
+    # is applied to copies of the current index and chunk offsets, saved
+    # under a new version directory, then published atomically.
+    # Single-document changes come from the UI and use the short
+    # interactive lock timeout.
+    def _commit(self, change, document_ids=(), rebuild=False):
+        with SnapshotWriteLock(timeout=INTERACTIVE_WRITE_LOCK_TIMEOUT):
+            version, index, chunk_store = self._begin_snapshot(rebuild)
+            try:
+                index, result = change(index, chunk_store)
+            except BaseException:
+                self._discard_snapshot(version, chunk_store)
+                raise
+            self._publish_snapshot(version, index, chunk_store, document_ids)
+
+        return result
+
+    def _begin_snapshot(self, rebuild):
+        # Caller holds the write lock
+        self.reload(force=True)
+
+        version = max(get_max_document_version(), self.version or 0) + 1
+        os.makedirs(snapshot_path(version), exist_ok=True)
+        meta_path = snapshot_path(version, SNAPSHOT_META_FILE)
+
+        if rebuild or self.chunk_store is None:
+            index = None
+            chunk_store = ChunkStore(blob_path(version), meta_path)
+            chunk_store.write([])
+        else:
+            index = None
+            if self.index is not None and self._mmap_index:
+                # A memory-mapped index (and any clone of it) only views
+                # the file and aborts on add; read an owned copy instead
+                index = load_index(snapshot_path(self.version, SNAPSHOT_INDEX_FILE))
+            elif self.index is not None:
+                index = faiss.clone_index(self.index)
+            chunk_store = self.chunk_store.derive(meta_path)
+
+        return version, index, chunk_store
+
+    def _publish_snapshot(self, version, index, chunk_store, document_ids):
+        if index is not None:
+            save_index(index, snapshot_path(version, SNAPSHOT_INDEX_FILE))
+        write_manifest(version, chunk_store.blob_path, index is not None, chunk_store.dimension)
+
+        for document_id in document_ids:
+            set_document_version(document_id, version)
+
+        publish_version(version)
+        self._swap(index, chunk_store, version)
+        prune_snapshots()
+
+    def _discard_snapshot(self, version, chunk_store):
+        # Never published, so no reader can have it open; a derived store
+        # only appended to the shared blob past its own offsets
+        chunk_store.close()
+        shutil.rmtree(snapshot_path(version), ignore_errors=True)
+
+        if chunk_store.blob_path == blob_path(version):
+            for path in (chunk_store.blob_path, chunk_store.vectors_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    # ==============================
+    # CREATE EMBEDDINGS (full rebuild)
+    # ==============================
+    def create_embeddings(self, chunks, document_id=0):
+        self.reset_index()
+        self.add_document(document_id, chunks)
+
+    def reset_index(self):
+        delete_chunks()
+        self._commit(lambda index, chunk_store: (None, None), rebuild=True)
+
+    # ==============================
+    # PER-DOCUMENT UPDATES
+    # ==============================
+    # Chunk rows and embeddings are prepared outside any lock; searches
+    # keep running on the previous snapshot until the swap.
+    def add_document(self, document_id, chunks):
+        if not chunks:
+            # Every chunk was a copy of one already indexed (see dedup):
+            # nothing to publish, the version only marks it as indexed
+            set_document_version(document_id, read_current_version() or 0)
+            return []
+
+        chunk_ids, embeddings = self._prepare(document_id, chunks)
+
+        def change(index, chunk_store):
+            index = self._add(index, chunk_store, document_id, chunk_ids, chunks, embeddings)
+            return index, chunk_ids
+
+        return self._commit_new_rows(change, document_id, chunk_ids)
+
+    def delete_document(self, document_id):
+        chunk_ids = self._commit(
+            lambda index, chunk_store: self._remove(index, chunk_store, document_id),
+            [document_id]
+        )
+        delete_chunks(document_id)
+        # Chunks of other documents dropped as copies of this one's
+        restore_orphaned_duplicates(self)
+        return chunk_ids
+
+    def replace_document(self, document_id, chunks):
+        # Old chunk rows stay until the new snapshot is published, so a
+        # failed replace leaves the document exactly as it was
+        old_chunk_ids = get_chunk_ids(document_id)
+        chunk_ids, embeddings = self._prepare(document_id, chunks)
+
+        def change(index, chunk_store):
+            index, _ = self._remove(index, chunk_store, document_id)
+            index = self._add(index, chunk_store, document_id, chunk_ids, chunks, embeddings)
+            return index, chunk_ids
+
+        result = self._commit_new_rows(change, document_id, chunk_ids)
+        delete_chunk_ids(old_chunk_ids)
+        return result
+
+    def _commit_new_rows(self, change, document_id, chunk_ids):
+        # Chunk rows stored by _prepare are removed again if the snapshot
+        # is never published (lock timeout, encode or write error)
+        try:
+            return self._commit(change, [document_id])
+        except BaseException:
+            delete_chunk_ids(chunk_ids)
+            raise
+
+    def add_documents(self, documents, rebuild=False, commit_every=BULK_COMMIT_CHUNKS,
+                      lock_timeout=WRITE_LOCK_TIMEOUT):
+        # Bulk ingestion: documents is an iterable of (document_id, chunks)
+        # where chunks may be a lazy iterator. Chunks are embedded in
+        # batches as they arrive and applied to the index every
+        # commit_every chunks, so text and vectors for the whole library
+        # are never held at once. Everything goes into one snapshot that
+        # is published at the end; until then searches keep using the
+        # previous one, which also survives a failed run untouched.
+        new_chunk_ids = []
+        document_ids = set()
+        pending = []
+        pending_count = 0
+        total = 0
+
+        with SnapshotWriteLock(timeout=lock_timeout):
+            # Read under the lock: rows another writer stores while we
+            # wait must count as older than this rebuild
+            first_chunk_id = get_max_chunk_id() + 1
+            version, index, chunk_store = self._begin_snapshot(rebuild)
+
+            try:
+                for document_id, chunks in documents:
+                    document_ids.add(document_id)
+                    position = 0
+
+                    for batch in batched(chunks, EMBED_BATCH_SIZE):
+                        chunk_ids, embeddings = self._prepare(document_id, batch)
+                        new_chunk_ids.extend(chunk_ids)
+                        pending.append((document_id, position, chunk_ids, batch, embeddings))
+                        position += len(batch)
+                        pending_count += len(batch)
+
+                        if pending_count >= commit_every:
+                            index = self._apply_pending(index, chunk_store, pending)
+                            total += pending_count
+                            pending, pending_count = [], 0
+
+                if pending:
+                    index = self._apply_pending(index, chunk_store, pending)
+                    total += pending_count
+            except BaseException:
+                self._discard_snapshot(version, chunk_store)
+                delete_chunk_ids(new_chunk_ids)
+                raise
+
+            self._publish_snapshot(version, index, chunk_store, sorted(document_ids))
+
+        if rebuild:
+            delete_chunks_before(first_chunk_id)
+
+        return total
+
+    def _apply_pending(self, index, chunk_store, pending):
+        document_ids = np.concatenate([np.full(len(p[2]), p[0], dtype=np.int64) for p in pending])
+        positions = np.concatenate([np.arange(p[1], p[1] + len(p[2])) for p in pending])
+        chunk_ids = [chunk_id for p in pending for chunk_id in p[2]]
+        chunks = [chunk for p in pending for chunk in p[3]]
+        embeddings = np.vstack([p[4] for p in pending])
+
+        return self._add(
+            index, chunk_store, document_ids, chunk_ids, chunks, embeddings, positions
+        )
+
+    def is_document_indexed(self, document_id):
+        # Answered from SQLite so a worker using the retrieval server
+        # never has to load the index for it
+        return has_indexed_chunks(document_id)
+
+    def _prepare(self, document_id, chunks):
+        if not chunks:
+            return [], None
+
+        chunk_ids = store_chunks(document_id, chunks)
+        try:
+            embeddings = generate_embeddings(chunks)
+        except BaseException:
+            delete_chunk_ids(chunk_ids)
+            raise
+        return chunk_ids, embeddings
+
+    def _add(self, index, chunk_store, document_id, chunk_ids, chunks, embeddings, positions=None):
+        if not chunk_ids:
+            return index
+
+        if index is None:
+            index = create_id_index(embeddings.shape[1])
+
+        index.add_with_ids(
+            np.array(embeddings, dtype=np.float32),
+            np.array(chunk_ids, dtype=np.int64)
+        )
+
+        # Chunk text is persisted next to the index so a fresh process
+        # can serve queries without re-reading PDFs or re-encoding
+        chunk_store.append(document_id, chunk_ids, chunks, embeddings, positions)
+
+        # Switch to an ANN index (training it) once the corpus is big enough
+        return maybe_rebuild(index, chunk_store.meta["chunk_id"], chunk_store.get_vectors)
+
+    def _remove(self, index, chunk_store, document_id):
+        chunk_ids = chunk_store.remove_document(document_id)
+
+        if index is not None and len(chunk_ids) > 0:
+            index = remove_vectors(
+                index, chunk_ids, chunk_store.meta["chunk_id"], chunk_store.get_vectors
+            )
+
+        return index, chunk_ids
+
+    # ==============================
+    # RETRIEVE CONTEXT
+    # ==============================
+    def retrieve_context(self, query, top_k=3):
+
+        if self._retrieval_client is not None:
+            try:
+                return self._retrieval_client.retrieve(query, top_k)
+            except OSError:
+                # Server down or restarting; answer from this process
+                pass
+
+        # Cache hits skip the batch window
+        self.reload()
+        normalized = normalize_query(query)
+
+        with self._lock.read():
+            if self.index is None:
+                raise ValueError("FAISS index not initialized.")
+
+            chunk_ids = self._query_results.get((normalized, top_k, self.version))
+            if chunk_ids is not None:
+                return self._build_context(chunk_ids)
+
+        return self.query_batcher.submit((query, top_k))
+
+    def _retrieve_batch(self, requests):
+        # requests: (query, top_k) pairs collected by the query batcher
+        by_top_k = {}
+        for i, (query, top_k) in enumerate(requests):
+            by_top_k.setdefault(top_k, []).append(i)
+
+        contexts = [None] * len(requests)
+        for top_k, positions in by_top_k.items():
+            found = self.retrieve_many([requests[i][0] for i in positions], top_k)
+            for i, context in zip(positions, found):
+                contexts[i] = context
+
+        return contexts
+
+    def retrieve_with_sources(self, query, top_k=3, skip=0):
+        # (context, source document ids, snapshot version) for callers
+        # that must notice when those documents change (question bank).
+        # skip passes over the best matches so successive calls can use
+        # different chunks; when fewer exist the best ones are used.
+        # Not batched; these calls come from background refills.
+        if self._retrieval_client is not None:
+            try:
+                return self._retrieval_client.retrieve_with_sources(query, top_k, skip)
+            except OSError:
+                pass
+
+        chunk_ids = self._search_many([query], skip + top_k)[0]
+        chunk_ids = chunk_ids[skip:] or chunk_ids[:top_k]
+
+        with self._lock.read():
+            document_ids = sorted({
+                int(document_id) for document_id, _, _ in self.chunk_store.get_chunks(chunk_ids)
+            })
+            return self._build_context(chunk_ids), document_ids, self.version
+
+    def retrieve_many(self, queries, top_k=3):
+        # One encode and one FAISS search for every query not already
+        # cached; concurrent retrieve_context() calls arrive here batched
+        results = self._search_many(queries, top_k)
+
+        with self._lock.read():
+            return [self._build_context(chunk_ids) for chunk_ids in results]
+
+    def _search_many(self, queries, top_k):
+        # Chunk ids per query, best first
+        self.reload()
+        normalized = [normalize_query(query) for query in queries]
+        results = [None] * len(queries)
+
+        with self._lock.read():
+            if self.index is None:
+                raise ValueError("FAISS index not initialized.")
+
+            for i, query in enumerate(normalized):
+                results[i] = self._query_results.get((query, top_k, self.version))
+
+        missing = [i for i, chunk_ids in enumerate(results) if chunk_ids is None]
+
+        if missing:
+            query_embeddings = self.embed_queries([normalized[i] for i in missing])
+
+            with self._lock.read():
+                if self.index is None:
+                    raise ValueError("FAISS index not initialized.")
+
+                distances, indices = self.index.search(
+                    query_embeddings, candidate_count(self.index, top_k)
+                )
+
+                for row, i in enumerate(missing):
+                    # FAISS pads with -1 when the index holds fewer than top_k rows
+                    chunk_ids = [chunk_id for chunk_id in indices[row] if chunk_id >= 0]
+
+                    if is_quantized(self.index):
+                        chunk_ids = self.chunk_store.rerank(query_embeddings[row], chunk_ids, top_k)
+
+                    self._query_results.put((normalized[i], top_k, self.version), chunk_ids)
+                    results[i] = chunk_ids
+
+        return results
+
+    def _build_context(self, chunk_ids):
+        # Caller holds the read lock. Overlapping neighbours are stitched,
+        # repeats dropped and the result cut to CONTEXT_TOKEN_BUDGET.
+        chunks = [
+            (rank, document_id, position, text)
+            for rank, (document_id, position, text) in enumerate(self.chunk_store.get_chunks(chunk_ids))
+        ]
+
+        context, raw_tokens, packed_tokens = build_context(chunks)
+        self.context_stats.add(raw_tokens, packed_tokens)
+        return context
+
+    def embed_query(self, normalized_query):
+        return self.embed_queries([normalized_query])
+
+    def embed_queries(self, normalized_queries):
+        embeddings = [self._query_embeddings.get(query) for query in normalized_queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            encoded = np.array(
+                embed_texts([normalized_queries[i] for i in missing]), dtype=np.float32
+            )
+            for row, i in enumerate(missing):
+                embeddings[i] = encoded[row:row + 1]
+                self._query_embeddings.put(normalized_queries[i], embeddings[i])
+
+        return np.vstack(embeddings)
+
+    # ==============================
+    # LLM CALL (rate-limited, retried)
+    # ==============================
+    # Raises LLMError once retries are exhausted; nothing is fabricated,
+    # so a failed call never reaches the evaluations table. Responses are
+    # cached per call_type (see LLM_CACHE_CALL_TYPES) and identical
+    # prompts in flight share one upstream call.
+    # validate(reply) raising keeps a reply out of the cache, so one
+    # malformed reply does not stick to its prompt for LLM_CACHE_TTL.
+    def call_llm_stream(self, prompt, call_type=None, validate=None):
+        # Generator of text deltas; raises LLMError like call_llm
+        client = get_llm_client()
+        return cached_stream(
+            client.generate_stream, client.model, prompt, call_type, validate=validate
+        )
+
+    def call_llm(self, prompt, call_type=None, config=None, validate=None):
+        client = get_llm_client()
+        return cached_generate(
+            lambda text: client.generate(text, config=config), client.model, prompt, call_type,
+            validate=validate
+        )
+
+    # ==============================
+    # GENERATE QUESTION
+    # ==============================
+    # With a user_id the question comes from the pre-generated bank
+    # when one is available; the live path below is the fallback.
+    def generate_question(self, topic, user_id=None):
+
+        if user_id is not None:
+            served = self.question_bank.take(user_id, topic)
+            if served is not None:
+                return served
+
+        context = self.retrieve_context(topic)
+        question = self.call_llm(question_prompt(context), "question")
+        return question, context
+
+    def generate_question_stream(self, topic, user_id=None):
+        # Like generate_question, but returns (text deltas, context) so the
+        # page can show the question while it is being written
+        if user_id is not None:
+            served = self.question_bank.take(user_id, topic)
+            if served is not None:
+                return iter([served[0]]), served[1]
+
+        context = self.retrieve_context(topic)
+        return self.call_llm_stream(question_prompt(context), "question"), context
+
+    def generate_questions(self, topic, count, avoid=(), window=0):
+        # Several distinct questions from one call; used to fill the bank.
+        # window selects which slice of the topic's ranked chunks is used
+        # (0: the best matches), so batches cover different material.
+        # Returns (questions, context, source document ids, index version).
+        top_k = max(3, count)
+        context, document_ids, version = self.retrieve_with_sources(
+            topic, top_k=top_k, skip=window * top_k
+        )
+
+        avoid_text = "\n".join(f"- {question}" for question in avoid) or "- (none)"
+
+        prompt = f"""
+Generate {count} different telecom quiz questions from the context below.
+Return one question per line, without numbering or any other text.
+
+Do not repeat these existing questions:
+{avoid_text}
+
+Context:
+{context}
+"""
+
+        raw_response = self.call_llm(prompt, "question_bank")
+
+        questions = []
+        for line in raw_response.splitlines():
+            question = re.sub(r"^\s*(?:[-*\u2022]|\d+[.)])\s*", "", line).strip()
+            if question and question not in avoid and question not in questions:
+                questions.append(question)
+
+        return questions[:count], context, document_ids, version
+
+    # ==============================
+    # ADAPTIVE QUESTION
+    # ==============================
+    def generate_adaptive_question(self, weak_concept):
+
+        context = self.retrieve_context(weak_concept)
+
+        prompt = f"""
+User is weak in {weak_concept}.
+Generate a reinforcement telecom question.
+
+Context:
+{context}
+"""
+
+        question = self.call_llm(prompt, "adaptive_question")
+        return question, context
+
+    def prescore(self, context, question, answer, topic=None):
+        if not PRESCORE_ENABLED:
+            return None
+
+        # The similarity check reuses the local encoder; with a retrieval
+        # server the encoder lives there, so only lexical checks run
+        embed = embed_texts if self._retrieval_client is None else None
+        return prescore_answer(context, question, answer, topic, embed)
+
+    def adaptive_followup(self, result, context):
+        # Uses the follow-up written by evaluate_answer(with_followup=True)
+        # together with the context it was written from; otherwise falls
+        # back to a separate retrieval + generation
+        if result.get("followup_question"):
+            return result["followup_question"], context
+
+        return self.generate_adaptive_question(result["weak_concept"])
+
+    # ==============================
+    # SAFE EVALUATION
+    # ==============================
+    # With with_followup the same call also writes the adaptive follow-up
+    # question for a weak answer, saving a second LLM round-trip; see
+    # adaptive_followup().
+    # Empty, "I don't know", copied or off-topic answers are graded
+    # locally (pre_scoring.py); topic is used as their weak concept.
+    def evaluate_answer(self, context, question, answer, with_followup=False, topic=None):
+
+        local_result = self.prescore(context, question, answer, topic)
+        if local_result is not None:
+            return local_result
+
+        prompt = f"""
+You are an evaluation engine.
+
+Context:
+{context}
+
+Question:
+{question}
+
+User Answer:
+{answer}
+
+Return ONLY valid JSON.
+Do NOT include markdown.
+Do NOT include backticks.
+Do NOT include explanation outside JSON.
+
+Format:
+{{
+    "score": integer between 0 and 10,
+    "correctness": "Correct" or "Partial" or "Incorrect",
+    "weak_concept": "short concept name",
+    "explanation": "brief explanation"{followup_field(with_followup)}
+}}
+"""
+
+        raw_response = self.call_llm(prompt, "evaluation", validate=parse_evaluation)
+        return parse_evaluation(raw_response)
+
+    def evaluate_answer_stream(self, context, question, answer, with_followup=False, topic=None):
+        # Returns an EvaluationStream: iterate it for the explanation as it
+        # is written, then read .result for the validated evaluation
+        local_result = self.prescore(context, question, answer, topic)
+        if local_result is not None:
+            return EvaluationStream(iter([]), local_result)
+
+        # The explanation comes first as plain text so it can be shown
+        # while the model writes it; the JSON grade follows the marker
+        prompt = f"""
+You are an evaluation engine.
+
+Context:
+{context}
+
+Question:
+{question}
+
+User Answer:
+{answer}
+
+First write a brief explanation of the grade for the learner, in plain text.
+Then write a line containing only {EVALUATION_MARKER}
+Then write ONLY valid JSON, without markdown or backticks, in this format:
+{{
+    "score": integer between 0 and 10,
+    "correctness": "Correct" or "Partial" or "Incorrect",
+    "weak_concept": "short concept name"{followup_field(with_followup)}
+}}
+"""
+
+        return EvaluationStream(
+            self.call_llm_stream(prompt, "evaluation", validate=parse_streamed_evaluation)
+        )
+
+    # ==============================
+    # BATCH EVALUATION
+    # ==============================
+    # items: (context, question, answer) tuples. Yields
+    # (index, result, error) as each batch is graded, in completion
+    # order; error is an LLMError when an answer could not be graded even
+    # on its own.
+    def evaluate_answers(self, items, batch_size=EVAL_BATCH_SIZE, workers=EVAL_BATCH_WORKERS):
+        indexed = []
+        for i, item in enumerate(items):
+            local_result = self.prescore(*item)
+            if local_result is not None:
+                yield i, local_result, None
+            else:
+                indexed.append((i, *item))
+
+        batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = {pool.submit(self._grade_batch, batch): batch for batch in batches}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    batch = pending.pop(future)
+                    try:
+                        results, failed = future.result()
+                    except LLMError as e:
+                        results, failed = {}, batch
+                        error = e
+                    else:
+                        error = None
+
+                    for item_id, result in results.items():
+                        yield item_id, result, None
+
+                    if not failed:
+                        continue
+
+                    if error is not None:
+                        # Already retried by the LLM client; splitting would not help
+                        for item in failed:
+                            yield item[0], None, error
+                    elif len(batch) == 1:
+                        yield failed[0][0], None, LLMError("Evaluation response could not be parsed")
+                    else:
+                        # Retry what was missing or malformed in smaller batches
+                        middle = max(1, len(failed) // 2)
+                        for part in (failed[:middle], failed[middle:]):
+                            if part:
+                                pending[pool.submit(self._grade_batch, part)] = part
+
+    def _grade_batch(self, batch):
+        # Returns (results by item id, items still ungraded)
+        item_ids = {item[0] for item in batch}
+
+        def validate(reply):
+            # Cache only replies that grade every answer in the batch
+            if len(parse_batch_response(reply, item_ids)) != len(item_ids):
+                raise ValueError("Incomplete batch evaluation")
+
+        raw_response = self.call_llm(
+            build_batch_prompt(batch), "batch_evaluation", EVALUATION_CONFIG, validate
+        )
+
+        try:
+            results = parse_batch_response(raw_response, item_ids)
+        except ValueError:
+            results = {}
+
+        return results, [item for item in batch if item[0] not in results]
+
+
+# ==============================
+# SHARED PIPELINE (one per process)
+# ==============================
+# Streamlit sessions share the module, so every page gets the same
+# index and chunk store instead of a private copy per logged-in user.
+
+def get_shared_pipeline():
+    global _shared_pipeline
+
+    if _shared_pipeline is None:
+        with _shared_pipeline_lock:
+            if _shared_pipeline is None:
+                _shared_pipeline = RAGPipeline()
+
+    return _shared_pipeline
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+import json
+import socket
+import http.client
+from urllib.parse import urlparse, unquote
+
+# http://127.0.0.1:8765 or unix:///run/tutor/retrieval.sock; empty
+# keeps retrieval in-process
+RETRIEVAL_SERVER_URL = os.getenv("RETRIEVAL_SERVER_URL", "")
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "10"))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RetrievalClient:
+    # Talks to backend.retrieval_server. Connection problems surface as
+    # OSError so the caller can fall back to searching in-process.
+
+    def __init__(self, url=RETRIEVAL_SERVER_URL, timeout=RETRIEVAL_TIMEOUT):
+        self.url = urlparse(url)
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.url.scheme == "unix":
+            return UnixHTTPConnection(unquote(self.url.path), timeout=self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.timeout)
+
+    def _request(self, method, path, payload=None):
+        conn = self._connection()
+        try:
+            body = json.dumps(payload) if payload is not None else None
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+
+        if response.status == 409:
+            # Same meaning as in-process: nothing has been indexed yet
+            raise ValueError(data.get("error", "FAISS index not initialized."))
+        if response.status != 200:
+            raise ConnectionError(f"Retrieval server error {response.status}: {data.get('error')}")
+
+        return data
+
+    def retrieve(self, query, top_k=3):
+        return self._request("POST", "/retrieve", {"query": query, "top_k": top_k})["context"]
+
+    def retrieve_with_sources(self, query, top_k=3, skip=0):
+        data = self._request(
+            "POST", "/retrieve", {"query": query, "top_k": top_k, "skip": skip, "sources": True}
+        )
+        return data["context"], data["document_ids"], data["version"]
+
+    def health(self):
+        return self._request("GET", "/health")
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from backend.rag_pipeline import RAGPipeline
+from backend.embedding_engine import get_engine
+
+# Usage: python -m backend.retrieval_server --port 8765
+#        python -m backend.retrieval_server --socket /run/tutor/retrieval.sock
+#
+# One process owns the encoder and a memory-mapped index and serves
+# every app worker; set RETRIEVAL_SERVER_URL in the workers to use it.
+# Concurrent requests from all workers are micro-batched into shared
+# encode/search calls (QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT_MS).
+# Index snapshots are hot-reloaded as in any other worker.
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+
+    rag = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "not found"})
+
+        rag = self.rag
+        self._send(200, {
+            "version": rag.version,
+            "chunks": len(rag.chunk_store) if rag.chunk_store is not None else 0,
+            "mean_batch_size": rag.query_batcher.mean_batch_size,
+            "context_tokens_saved": rag.context_stats.saved_tokens
+        })
+
+    def do_POST(self):
+        if self.path != "/retrieve":
+            return self._send(404, {"error": "not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            query = str(request["query"])
+            top_k = int(request.get("top_k", 3))
+            skip = int(request.get("skip", 0))
+            sources = bool(request.get("sources", False))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {"error": f"bad request: {e}"})
+
+        try:
+            if sources:
+                context, document_ids, version = self.rag.retrieve_with_sources(query, top_k, skip)
+                payload = {"context": context, "document_ids": document_ids, "version": version}
+            else:
+                payload = {"context": self.rag.retrieve_context(query, top_k)}
+        except ValueError as e:
+            return self._send(409, {"error": str(e)})
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+
+        self._send(200, payload)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host="127.0.0.1", port=8765, socket_path=None):
+    # Never forward to another server, and keep index codes memory-mapped
+    rag = RAGPipeline(retrieval_server_url=None, mmap_index=True)
+
+    # Load the encoder before accepting requests
+    get_engine().encode(["warmup"])
+
+    RetrievalHandler.rag = rag
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, RetrievalHandler)
+        print(f"Retrieval server listening on unix://{socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), RetrievalHandler)
+        print(f"Retrieval server listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared retrieval server for app workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.socket)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
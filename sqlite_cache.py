@@ -0,0 +1,62 @@
+import time
+from backend.db_pool import get_pooled_connection
+
+# A full cache is trimmed to this share of max_entries, so eviction
+# does not run on every insert
+EVICT_TO_RATIO = 0.9
+
+
+class SQLiteCache:
+    # One table keyed by key_column in its own SQLite file. last_used
+    # drives LRU eviction; with a ttl, rows whose created time is older
+    # expire (columns must then include "created REAL").
+
+    def __init__(self, path, table, key_column, columns, max_entries, ttl=None):
+        self.path = path
+        self.table = table
+        self.key_column = key_column
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        conn = self._connect()
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key_column} TEXT PRIMARY KEY,
+            {columns},
+            last_used REAL
+        )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return get_pooled_connection(self.path)
+
+    def _is_expired(self, created, now=None):
+        return self.ttl is not None and (now or time.time()) - created > self.ttl
+
+    def _touch(self, conn, keys, now=None):
+        now = now or time.time()
+        conn.executemany(
+            f"UPDATE {self.table} SET last_used=? WHERE {self.key_column}=?",
+            [(now, key) for key in keys]
+        )
+
+    def _delete(self, conn, key):
+        conn.execute(f"DELETE FROM {self.table} WHERE {self.key_column}=?", (key,))
+
+    def _evict(self, conn, now=None):
+        if self.ttl is not None:
+            conn.execute(f"DELETE FROM {self.table} WHERE created < ?", ((now or time.time()) - self.ttl,))
+
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        excess = count - int(self.max_entries * EVICT_TO_RATIO)
+        conn.execute(f"""
+            DELETE FROM {self.table} WHERE {self.key_column} IN (
+                SELECT {self.key_column} FROM {self.table} ORDER BY last_used LIMIT ?
+            )
+        """, (excess,))
\ No newline at end of file
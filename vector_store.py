@@ -1,17 +1,198 @@
-import faiss
-import numpy as np
-import os
-
-def create_faiss_index(embeddings):
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(np.array(embeddings))
-    return index
-
-
-def save_index(index, path="faiss_index/index.bin"):
-    faiss.write_index(index, path)
-
-
-def load_index(path="faiss_index/index.bin"):
-    return faiss.read_index(path)
\ No newline at end of file
+import faiss
+import numpy as np
+import os
+import math
+from backend.chunk_store import atomic_write
+
+# flat | ivf_flat | hnsw | ivf_pq | sq8 | pq | auto (pick by corpus size)
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")
+
+# auto mode: brute force below the first size, IVF-Flat below the
+# second, IVF-PQ beyond. HNSW is opt-in since it cannot delete in place.
+AUTO_IVF_MIN_VECTORS = int(os.getenv("FAISS_AUTO_IVF_MIN_VECTORS", "20000"))
+AUTO_PQ_MIN_VECTORS = int(os.getenv("FAISS_AUTO_PQ_MIN_VECTORS", "500000"))
+
+IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+PQ_SUBVECTOR_DIM = 8
+
+# Quantized indexes fetch this many times top_k candidates and re-rank
+# them exactly against the float16 vectors kept in the chunk store
+RERANK_FACTOR = int(os.getenv("FAISS_RERANK_FACTOR", "4"))
+QUANTIZED_TYPES = ("ivf_pq", "sq8", "pq")
+
+# Map flat/IVF codes straight from the snapshot file instead of copying
+# them into each process's heap
+MMAP_INDEX = os.getenv("FAISS_MMAP_INDEX", "0") == "1"
+
+# k-means wants roughly 39 training points per centroid
+MIN_TRAIN_PER_LIST = 39
+
+
+def create_faiss_index(embeddings):
+    dimension = embeddings.shape[1]
+    index = faiss.IndexFlatL2(dimension)
+    index.add(np.array(embeddings))
+    return index
+
+
+def create_id_index(dimension):
+    # Vectors are addressed by chunks.chunk_id so single documents can
+    # be added or removed without rebuilding the whole index
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+
+# ==============================
+# INDEX TYPES
+# ==============================
+
+def ivf_lists_for(num_vectors):
+    return max(1, int(4 * math.sqrt(num_vectors)))
+
+
+def choose_index_type(num_vectors, index_type=None):
+    index_type = index_type or INDEX_TYPE
+
+    if index_type == "auto":
+        if num_vectors >= AUTO_PQ_MIN_VECTORS:
+            index_type = "ivf_pq"
+        elif num_vectors >= AUTO_IVF_MIN_VECTORS:
+            index_type = "ivf_flat"
+        else:
+            index_type = "flat"
+
+    # IVF variants need enough vectors to train their coarse quantizer,
+    # PQ enough to train 256 centroids per sub-quantizer
+    if index_type in ("ivf_flat", "ivf_pq"):
+        if num_vectors < MIN_TRAIN_PER_LIST * ivf_lists_for(num_vectors):
+            return "flat"
+    if index_type == "pq" and num_vectors < MIN_TRAIN_PER_LIST * 256:
+        return "flat"
+    if index_type == "sq8" and num_vectors == 0:
+        return "flat"
+
+    return index_type
+
+
+def index_type_of(index):
+    if isinstance(index, faiss.IndexIDMap2):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexScalarQuantizer):
+            return "sq8"
+        if isinstance(inner, faiss.IndexPQ):
+            return "pq"
+        return "flat"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    return "flat"
+
+
+def is_quantized(index):
+    return index_type_of(index) in QUANTIZED_TYPES
+
+
+def build_index(vectors, ids, index_type):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ids = np.asarray(ids, dtype=np.int64)
+    dimension = vectors.shape[1]
+
+    if index_type == "flat":
+        index = create_id_index(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(dimension, HNSW_M))
+    elif index_type in ("sq8", "pq"):
+        # 1 byte per dimension (sq8) or per PQ_SUBVECTOR_DIM dimensions (pq)
+        if index_type == "sq8":
+            inner = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit)
+        else:
+            inner = faiss.IndexPQ(dimension, dimension // PQ_SUBVECTOR_DIM, 8)
+        inner.train(vectors)
+        index = faiss.IndexIDMap2(inner)
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        # IVF keeps chunk ids natively, so no IDMap wrapper is needed
+        nlist = ivf_lists_for(len(vectors))
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, dimension // PQ_SUBVECTOR_DIM, 8)
+        index.train(vectors)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    else:
+        raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+    if len(vectors) > 0:
+        index.add_with_ids(vectors, ids)
+
+    configure_search(index)
+    return index
+
+
+def configure_search(index):
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(IVF_NPROBE, index.nlist)
+    elif isinstance(index, faiss.IndexIDMap2):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+# ==============================
+# RETRAINING DURING INGESTION
+# ==============================
+
+def maybe_rebuild(index, ids, exact_vectors=None):
+    # Rebuild when the corpus has outgrown the current index type, or an
+    # IVF index has too few lists for its size; ids are every chunk id
+    # held by the index. exact_vectors(ids) avoids re-training on lossy
+    # reconstructions when a quantized index is rebuilt.
+    current = index_type_of(index)
+    wanted = choose_index_type(index.ntotal)
+
+    if current == wanted:
+        if not isinstance(index, faiss.IndexIVF):
+            return index
+        if ivf_lists_for(index.ntotal) < 2 * index.nlist:
+            return index
+
+    return build_index(stored_vectors(index, ids, exact_vectors), ids, wanted)
+
+
+def remove_vectors(index, ids, keep_ids, exact_vectors=None):
+    try:
+        index.remove_ids(np.asarray(ids, dtype=np.int64))
+        return index
+    except RuntimeError:
+        # HNSW graphs cannot drop nodes; rebuild from what remains
+        vectors = stored_vectors(index, keep_ids, exact_vectors)
+        return build_index(vectors, keep_ids, index_type_of(index))
+
+
+def stored_vectors(index, ids, exact_vectors=None):
+    vectors = exact_vectors(ids) if exact_vectors is not None else None
+    if vectors is None:
+        vectors = index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+    return vectors
+
+
+# ==============================
+# RE-RANKING
+# ==============================
+
+def candidate_count(index, top_k):
+    return top_k * RERANK_FACTOR if is_quantized(index) else top_k
+
+
+def save_index(index, path="faiss_index/index.bin"):
+    atomic_write(path, lambda f: faiss.write_index(index, faiss.PyCallbackIOWriter(f.write)))
+
+
+def load_index(path="faiss_index/index.bin", mmap=False):
+    flags = faiss.IO_FLAG_MMAP_IFC if mmap else 0
+    return configure_search(faiss.read_index(path, flags))
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+import threading
+
+# Set WARMUP_ON_START=0 to keep loading fully lazy
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def _warm():
+    from backend.embedding_engine import get_engine
+    from backend.llm_client import get_client
+    from backend.rag_pipeline import get_shared_pipeline
+    from backend.retrieval_client import RETRIEVAL_SERVER_URL
+
+    # One encode pulls the weights and tokenizer fully into memory; with
+    # a retrieval server the encoder lives there instead
+    if not RETRIEVAL_SERVER_URL:
+        get_engine().encode(["warmup"])
+    get_client()
+
+    # Top up the question bank for recently practised topics
+    get_shared_pipeline().question_bank.warm()
+
+
+def start_warmup():
+    # Runs once per process in a daemon thread so the first page renders
+    # immediately while the model and index load in the background
+    global _warmup_thread
+
+    if not WARMUP_ON_START:
+        return None
+
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm, name="warmup", daemon=True)
+            _warmup_thread.start()
+
+    return _warmup_thread
\ No newline at end of file